@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.api.endpoints.authentication import router as auth_router
 from app.api.endpoints.tasks import router as tasks_router
+from app.api.endpoints.profiles import router as profiles_router
 router = APIRouter()
 
 # Include the authentication router
@@ -9,3 +10,5 @@ router.include_router(auth_router, prefix="/auth", tags=["authentication"])
 # Include the tasks router
 router.include_router(tasks_router, prefix="/tasks", tags=["tasks"])
 
+# Include the task profiles router
+router.include_router(profiles_router, prefix="/profiles", tags=["profiles"])
@@ -0,0 +1,67 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.models.profile_models import (
+    ProfileAggregateResponse,
+    ProfileInfo,
+    ProfileListResponse,
+)
+from app.services import profiling
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/", response_model=ProfileListResponse)
+async def list_profiles(
+    task_name: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """List stored task profiles, newest first"""
+    try:
+        profiles = profiling.list_profiles(task_name, offset=(page - 1) * page_size, limit=page_size)
+        return ProfileListResponse(
+            profiles=[ProfileInfo(**meta) for meta in profiles], page=page, page_size=page_size
+        )
+    except Exception as e:
+        logger.error(f"Error listing profiles: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list profiles")
+
+
+@router.get("/aggregate/{task_name}", response_model=ProfileAggregateResponse)
+async def aggregate_profiles(
+    task_name: str,
+    runs: int = Query(20, ge=1, le=200),
+    limit: int = Query(30, ge=1, le=500),
+):
+    """Merge the latest profiles of a task and return its hottest functions"""
+    try:
+        return ProfileAggregateResponse(**profiling.aggregate_profiles(task_name, runs=runs, limit=limit))
+    except Exception as e:
+        logger.error(f"Error aggregating profiles: {e}")
+        raise HTTPException(status_code=500, detail="Failed to aggregate profiles")
+
+
+@router.get("/{task_id}/info", response_model=ProfileInfo)
+async def get_profile_info(task_id: str):
+    """Get metadata of a task's profile"""
+    meta = profiling.get_profile_meta(task_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return ProfileInfo(**meta)
+
+
+@router.get("/{task_id}")
+async def download_profile(task_id: str):
+    """Download a task's profile in pstats format"""
+    data = profiling.get_profile_data(task_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{task_id}.prof"'},
+    )
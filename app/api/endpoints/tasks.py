@@ -1,25 +1,40 @@
 import logging
+import re
 from datetime import datetime
 from typing import Optional
+from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from app.celery_app import celery_app
 from app.models.task_models import (
+    BatchCreateTaskRequest,
+    BatchTaskResponse,
+    BulkCancelRequest,
+    BulkCancelResponse,
+    CreatePipelineRequest,
     CreateTaskRequest,
+    PipelineResponse,
+    PipelineStep,
     TaskListResponse,
     TaskResponse,
     TaskStatus,
     TaskStatusResponse,
     TaskType,
 )
-from app.services.celery_service import get_task_data
-from app.tasks.background_tasks import (
-    generate_report_task,
-    process_data_task,
-    process_file_task,
-    send_email_task,
+from app.services import cancellation, idempotency, pipelines, results, task_events
+from app.services.celery_service import (
+    GENERATE_REPORT_TASK,
+    PROCESS_DATA_TASK,
+    PROCESS_FILE_TASK,
+    SEND_EMAIL_TASK,
+    TASK_NAMES,
+    get_celery_app,
+    get_task_data,
 )
+from app.services.pipelines import PIPELINE_HEADER
+from app.services.profiling import PROFILE_HEADER
 
 # Assuming you have an authentication dependency
 # from app.core.auth import get_current_user
@@ -31,12 +46,12 @@ logger = logging.getLogger(__name__)
 def get_task_info(task_id: str) -> TaskResponse:
     """Get task information from Celery"""
     try:
-        result = celery_app.AsyncResult(task_id)
+        result = get_celery_app().AsyncResult(task_id)
 
         # Get task info with all required fields initialized
         task_info = {
             "task_id": task_id,
-            "status": TaskStatus(result.status),
+            "status": TaskStatus.from_state(result.status),
             "created_at": datetime.utcnow(),  # This would come from your DB in real app
             "started_at": datetime.utcnow(),  # Always provide a value for now
             "completed_at": None,
@@ -61,16 +76,21 @@ def get_task_info(task_id: str) -> TaskResponse:
                 }
             )
         elif result.state == "SUCCESS":
+            # Only metadata here; the payload is served by GET /{task_id}/result
+            info = result.info if isinstance(result.info, dict) else {}
             task_info.update(
                 {
                     "progress": 100,
-                    "result": result.result,
+                    "result": None,
+                    "result_size": info.get("result_size"),
+                    "result_url": results.result_url(task_id),
                     "completed_at": datetime.utcnow(),  # This would come from result in real app
                     "error": None,
                 }
             )
         elif result.state == "FAILURE":
-            info = result.info or {}
+            # result.info is the raised exception here
+            info = result.info if isinstance(result.info, dict) else {}
             task_info.update(
                 {
                     "progress": info.get("progress", 0),
@@ -90,64 +110,283 @@ def get_task_info(task_id: str) -> TaskResponse:
         raise HTTPException(status_code=500, detail="Failed to get task information")
 
 
+def _publish_task(request: CreateTaskRequest, task_id: str, options: dict) -> None:
+    """Publish the Celery task for a create request under a pre-assigned task id"""
+    celery_app = get_celery_app()
+
+    if request.task_type == TaskType.DATA_PROCESSING:
+        params = request.parameters
+        celery_app.send_task(
+            PROCESS_DATA_TASK,
+            args=(params.data_size, params.processing_time, params.include_error),
+            task_id=task_id,
+            **options,
+        )
+
+    elif request.task_type == TaskType.FILE_PROCESSING:
+        params = request.parameters
+        celery_app.send_task(
+            PROCESS_FILE_TASK, args=(params.file_url, params.operation), task_id=task_id, **options
+        )
+
+    elif request.task_type == TaskType.EMAIL_SENDING:
+        params = request.parameters
+        celery_app.send_task(
+            SEND_EMAIL_TASK,
+            args=(params.recipient, params.subject, params.message, params.delay_seconds),
+            task_id=task_id,
+            **options,
+        )
+
+    elif request.task_type == TaskType.REPORT_GENERATION:
+        celery_app.send_task(
+            GENERATE_REPORT_TASK,
+            args=(request.parameters.get("report_type", "default"), request.parameters),
+            task_id=task_id,
+            **options,
+        )
+
+    else:
+        raise HTTPException(status_code=400, detail="Invalid task type")
+
+
+def submit_task(
+    request: CreateTaskRequest,
+    profile: bool = False,
+    idempotency_key: Optional[str] = None,
+    batch_index: Optional[int] = None,
+) -> TaskResponse:
+    """
+    Create a task, or return the task already created under the same idempotency key
+    (item `batch_index` of a batch submitted under it). Raises IdempotencyKeyReused if
+    the key was used for a different request.
+    """
+    task_id = str(uuid4())
+
+    if idempotency_key:
+        request_fingerprint = idempotency.fingerprint(request.model_dump_json())
+        existing_task_id = idempotency.claim(idempotency_key, task_id, request_fingerprint, batch_index)
+        if existing_task_id:
+            logger.info(f"Idempotency key {idempotency_key} already used by task {existing_task_id}")
+            return get_task_info(existing_task_id)
+
+    options = {"headers": {PROFILE_HEADER: True}} if profile else {}
+    try:
+        _publish_task(request, task_id, options)
+    except Exception:
+        if idempotency_key:
+            idempotency.release(idempotency_key, task_id, request_fingerprint, batch_index)
+        raise
+
+    # In a real application, you'd save task info to database here
+    logger.info(f"Created task {task_id} of type {request.task_type}")
+
+    return get_task_info(task_id)
+
+
 @router.post("/", response_model=TaskResponse)
 async def create_task(
     request: CreateTaskRequest,
+    x_profile: bool = Header(False),
+    idempotency_key: Optional[str] = Header(None),
     # current_user = Depends(get_current_user)  # Uncomment when auth is ready
 ):
-    """Create a new background task"""
+    """
+    Create a new background task.
+    Send `X-Profile: true` to profile it, and an `Idempotency-Key` to make retries safe;
+    reusing a key for a different request is rejected with 422.
+    """
     try:
-        task_id = None
+        return submit_task(request, profile=x_profile, idempotency_key=idempotency_key)
 
-        if request.task_type == TaskType.DATA_PROCESSING:
-            params = request.parameters
-            task = process_data_task.delay(
-                params.data_size, params.processing_time, params.include_error
-            )
-            task_id = task.id
+    except idempotency.IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating task: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        elif request.task_type == TaskType.FILE_PROCESSING:
-            params = request.parameters
-            task = process_file_task.delay(params.file_url, params.operation)
-            task_id = task.id
 
-        elif request.task_type == TaskType.EMAIL_SENDING:
-            params = request.parameters
-            task = send_email_task.delay(
-                params.recipient, params.subject, params.message, params.delay_seconds
-            )
-            task_id = task.id
+@router.post("/batch", response_model=BatchTaskResponse)
+async def create_tasks_batch(
+    request: BatchCreateTaskRequest,
+    x_profile: bool = Header(False),
+    idempotency_key: Optional[str] = Header(None),
+    # current_user = Depends(get_current_user)  # Uncomment when auth is ready
+):
+    """
+    Create several background tasks.
+    With an `Idempotency-Key`, each item is deduplicated under the key and its position,
+    so a retried batch only publishes the items that were not submitted before; an item
+    that differs from the one first submitted at its position is rejected with 422.
+    """
+    try:
+        tasks = [
+            submit_task(item, profile=x_profile, idempotency_key=idempotency_key, batch_index=index)
+            for index, item in enumerate(request.tasks)
+        ]
+        return BatchTaskResponse(tasks=tasks)
+
+    except idempotency.IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating task batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        elif request.task_type == TaskType.REPORT_GENERATION:
-            task = generate_report_task.delay(
-                request.parameters.get("report_type", "default"), request.parameters
-            )
-            task_id = task.id
 
-        else:
-            raise HTTPException(status_code=400, detail="Invalid task type")
+def _pipeline_step_signature(celery_app, step: PipelineStep, task_ids: dict, pipeline_id: str):
+    """Build the Celery signature of a pipeline step; upstream results are passed as references"""
+    if step.task_type == TaskType.REPORT_GENERATION:
+        kwargs = {
+            "report_type": step.parameters.get("report_type", "default"),
+            "parameters": dict(step.parameters),
+        }
+        arguments = kwargs["parameters"]
+    else:
+        kwargs = dict(step.parameters)
+        arguments = kwargs
+
+    for name, upstream_step_id in step.inputs.items():
+        arguments[name] = results.result_ref(task_ids[upstream_step_id])
+
+    return celery_app.signature(TASK_NAMES[step.task_type], kwargs=kwargs, immutable=True).set(
+        task_id=task_ids[step.id], headers={PIPELINE_HEADER: pipeline_id}
+    )
+
+
+def get_pipeline_info(record: dict) -> PipelineResponse:
+    """Aggregate the state and progress of a pipeline from its step tasks"""
+    celery_app = get_celery_app()
+    steps = []
+    for step in record["steps"]:
+        result = celery_app.AsyncResult(step["task_id"])
+        info = result.info if isinstance(result.info, dict) else {}
+        state = result.state
+        if state == "PENDING" and results.get_result_meta(step["task_id"]) is not None:
+            # The backend record expired before the pipeline's; the stored result shows it finished
+            state = "SUCCESS"
+        steps.append(
+            {
+                "step_id": step["step_id"],
+                "task_id": step["task_id"],
+                "task_type": step["task_type"],
+                "level": step.get("level"),
+                "status": state,
+                "progress": 100 if state == "SUCCESS" else info.get("progress", 0),
+                "result_url": results.result_url(step["task_id"]) if state == "SUCCESS" else None,
+                "error": str(result.info) if state == "FAILURE" else None,
+            }
+        )
+
+    failed_task_id = pipelines.get_failed_task(record["pipeline_id"])
+    return PipelineResponse(
+        pipeline_id=record["pipeline_id"],
+        description=record.get("description"),
+        created_at=record["created_at"],
+        failed_task_id=failed_task_id,
+        steps=steps,
+        **pipelines.aggregate_status(steps, failed_task_id),
+    )
 
-        if not task_id:
-            raise HTTPException(status_code=500, detail="Failed to create task")
 
-        # In a real application, you'd save task info to database here
-        logger.info(f"Created task {task_id} of type {request.task_type}")
+@router.post("/pipeline", response_model=PipelineResponse)
+async def create_pipeline(
+    request: CreatePipelineRequest,
+    # current_user = Depends(get_current_user)  # Uncomment when auth is ready
+):
+    """
+    Run a small DAG of tasks on the workers as one pipeline.
+    A step's `inputs` map task arguments to upstream steps whose results it receives
+    by reference; the first failing step stops the steps that have not run yet.
+    """
+    try:
+        levels = pipelines.plan_levels(request.steps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        return get_task_info(task_id)
+    try:
+        from celery import chain, group
+
+        celery_app = get_celery_app()
+        pipeline_id = str(uuid4())
+        task_ids = {step.id: str(uuid4()) for step in request.steps}
+
+        parts = []
+        for level in levels:
+            signatures = [_pipeline_step_signature(celery_app, step, task_ids, pipeline_id) for step in level]
+            parts.append(group(signatures) if len(signatures) > 1 else signatures[0])
+
+        record = {
+            "pipeline_id": pipeline_id,
+            "description": request.description,
+            "created_at": datetime.utcnow().isoformat(),
+            "steps": [
+                {
+                    "step_id": step.id,
+                    "task_id": task_ids[step.id],
+                    "task_type": step.task_type.value,
+                    "level": index,
+                }
+                for index, level in enumerate(levels)
+                for step in level
+            ],
+        }
+        # Saved before publishing so the workers can find it if a step fails right away
+        pipelines.save_pipeline(record)
+        (chain(*parts) if len(parts) > 1 else parts[0]).apply_async()
+
+        logger.info(f"Created pipeline {pipeline_id} with {len(request.steps)} steps")
+        return get_pipeline_info(record)
 
     except Exception as e:
-        logger.error(f"Error creating task: {e}")
+        logger.error(f"Error creating pipeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/pipeline/{pipeline_id}", response_model=PipelineResponse)
+async def get_pipeline_status(
+    pipeline_id: str,
+    # current_user = Depends(get_current_user)
+):
+    """Get the aggregated status of a pipeline and its steps"""
+    record = pipelines.get_pipeline(pipeline_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    try:
+        return get_pipeline_info(record)
+    except Exception as e:
+        logger.error(f"Error getting pipeline status: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get pipeline status")
+
+
 @router.get("/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str,
+    response: Response,
+    wait: float = Query(0, ge=0, le=60),
+    if_none_match: Optional[str] = Header(None),
     # current_user = Depends(get_current_user)
 ):
-    """Get the status of a specific task"""
+    """
+    Get the status of a specific task.
+    Responses carry an ETag of the task's state version; `If-None-Match` returns 304 when
+    nothing changed. With `wait`, the request is held open for up to that many seconds
+    until the state or progress changes.
+    """
     try:
-        task_info = get_task_data(task_id)
+        version = await task_events.get_version(task_id)
+        if wait:
+            known_version = task_events.parse_version_etag(if_none_match)
+            version = await task_events.task_event_hub.wait_for_change(
+                task_id, version if known_version is None else known_version, wait
+            )
+
+        etag = task_events.version_etag(version)
+        if if_none_match and etag in if_none_match:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+        # Blocking backend read; kept off the event loop that serves the long-polls
+        task_info = await run_in_threadpool(get_task_data, task_id)
         logger.info(f"Retrieved task info: {task_info}")
         return TaskStatusResponse(
             task_id=task_info.task_id,
@@ -158,6 +397,9 @@ async def get_task_status(
             created_at=task_info.created_at,
             started_at=task_info.started_at,
             completed_at=task_info.completed_at,
+            result_size=task_info.result_size,
+            result_url=task_info.result_url,
+            profile_url=task_info.profile_url,
         )
     except HTTPException:
         raise
@@ -166,20 +408,144 @@ async def get_task_status(
         raise HTTPException(status_code=500, detail="Failed to get task status")
 
 
+# A single byte range; other units and multiple ranges are not supported
+_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)", re.ASCII | re.IGNORECASE)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end) offsets.
+    Returns None for a range header to ignore (malformed or unsupported), so the whole
+    result is served, and raises ValueError for a range that cannot be satisfied.
+    """
+    match = _BYTE_RANGE.fullmatch(range_header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {range_header}")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+@router.get("/{task_id}/result")
+async def get_task_result(
+    task_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    # current_user = Depends(get_current_user)
+):
+    """
+    Stream the result payload of a finished task.
+    Supports `Range: bytes=...` (or `offset`/`limit`) for partial reads and `If-None-Match`.
+    """
+    try:
+        meta = results.get_result_meta(task_id)
+        if meta is None:
+            result = get_celery_app().AsyncResult(task_id)
+            if result.state != "SUCCESS":
+                raise HTTPException(status_code=404, detail=f"Result not available, task is {result.state}")
+            info = result.info if isinstance(result.info, dict) else {}
+            if "result_size" in info:
+                raise HTTPException(status_code=410, detail="Result has expired")
+            # Result stored inline in the backend by an older worker; move it to the result store
+            meta = results.store_result(task_id, info.get("result", result.result))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting task result: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get task result")
+
+    size = meta["size"]
+    etag = f'"{meta["etag"]}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = _parse_range(range_header, size) if range_header else None
+        if byte_range is not None:
+            start, end = byte_range
+        else:
+            if offset >= size and offset > 0:
+                raise ValueError(f"Offset {offset} is past the end of the result")
+            start, end = offset, min(offset + limit, size) - 1 if limit else size - 1
+    except ValueError as e:
+        raise HTTPException(
+            status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    status_code = 200
+    if (start, end) != (0, size - 1):
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        results.iter_result(task_id, start, end),
+        status_code=status_code,
+        media_type=meta["content_type"],
+        headers=headers,
+    )
+
+
 @router.delete("/{task_id}")
-async def cancel_task(
+def cancel_task(
     task_id: str,
     # current_user = Depends(get_current_user)
 ):
-    """Cancel a running task"""
+    """Cancel a task; a running task stops at its next progress update"""
+    # Plain def: the blocking Redis calls run in the threadpool, off the event loop
     try:
-        celery_app.control.revoke(task_id, terminate=True)
-        logger.info(f"Task {task_id} cancelled")
-        return {"message": f"Task {task_id} has been cancelled"}
+        cancelled = cancellation.cancel_tasks([task_id], get_celery_app().backend)
     except Exception as e:
         logger.error(f"Error cancelling task: {e}")
         raise HTTPException(status_code=500, detail="Failed to cancel task")
 
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Task {task_id} has already finished")
+    logger.info(f"Task {task_id} cancelled")
+    return {"message": f"Task {task_id} has been cancelled"}
+
+
+@router.post("/cancel", response_model=BulkCancelResponse)
+def cancel_tasks_bulk(
+    request: BulkCancelRequest,
+    # current_user = Depends(get_current_user)
+):
+    """
+    Cancel many tasks at once, by id and/or all steps of a pipeline.
+    With `status`, only the selected tasks currently in one of those states are cancelled;
+    finished tasks are never touched.
+    """
+    task_ids = list(dict.fromkeys(request.task_ids))
+    if request.pipeline_id:
+        record = pipelines.get_pipeline(request.pipeline_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Pipeline not found")
+        task_ids.extend(step["task_id"] for step in record["steps"] if step["task_id"] not in task_ids)
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="No tasks to cancel")
+
+    only_states = {status.value for status in request.status} if request.status else None
+    try:
+        cancelled = cancellation.cancel_tasks(task_ids, get_celery_app().backend, only_states)
+        logger.info(f"Cancelled {len(cancelled)} of {len(task_ids)} tasks")
+        return BulkCancelResponse(cancelled=cancelled, count=len(cancelled))
+    except Exception as e:
+        logger.error(f"Error cancelling tasks: {e}")
+        raise HTTPException(status_code=500, detail="Failed to cancel tasks")
+
 
 @router.get("/", response_model=TaskListResponse)
 async def list_tasks(
@@ -210,7 +576,7 @@ async def test_data_processing(
         },
         description=f"Test data processing task - {data_size} items",
     )
-    return await create_task(request)
+    return submit_task(request)
 
 
 @router.post("/test/email", response_model=TaskResponse)
@@ -231,4 +597,4 @@ async def test_email_task(
         },
         description="Test email task",
     )
-    return await create_task(request)
+    return submit_task(request)
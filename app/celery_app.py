@@ -4,20 +4,20 @@ from typing import Optional
 import os
 from datetime import datetime
 from app.core.config import get_settings
+from app.services.pipelines import install_pipeline_hooks
+from app.services.task_events import install_task_event_hooks
 
 settings = get_settings()
 
-# Initialize Celery app
+# Initialize Celery app; task modules in `include` are imported by the worker at
+# startup (before pool processes fork), not whenever this module is imported
 celery_app = Celery(
     "fastapi_celery_app",
     broker=settings.redis_url,
     backend=settings.redis_url,
+    include=["app.tasks.background_tasks"],
 )
 
-# Import tasks to register them
-from app.tasks import background_tasks
-
-
 celery_app.conf.update(
     task_serializer='json',
     accept_content=['json'],
@@ -35,7 +35,7 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1,
     worker_disable_rate_limits=False,
 
-    result_expires=3600,
+    result_expires=settings.result_expires_seconds,
     result_persistent=True,
 
     task_routes={
@@ -73,6 +73,18 @@ celery_app.conf.update(
 celery_app.conf.task_default_priority = 5
 celery_app.conf.worker_hijack_root_logger = False
 
+# Pipeline failure short-circuiting
+install_pipeline_hooks()
+
+# Task state versions for long-polling and conditional status requests
+install_task_event_hooks()
+
+# Per-task profiling; hooks are only connected when enabled so they cost nothing otherwise
+if settings.profiling_enabled:
+    from app.services.profiling import install_profiling_hooks
+
+    install_profiling_hooks()
+
 
 def create_celery_app() -> Celery:
     """
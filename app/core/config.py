@@ -29,6 +29,30 @@ class Settings(BaseSettings):
     redis_host: str = Field("localhost", env="REDIS_HOST")
     redis_port: int = Field(6379, env="REDIS_PORT")
     redis_db: int = Field(0, env="REDIS_DB")
+    redis_connect_timeout: float = Field(5.0, env="REDIS_CONNECT_TIMEOUT")
+
+    # Task submission config
+    idempotency_ttl_seconds: int = Field(24 * 3600, env="IDEMPOTENCY_TTL_SECONDS")
+
+    # Task result config
+    result_expires_seconds: int = Field(3600, env="RESULT_EXPIRES_SECONDS")
+    result_chunk_size: int = Field(64 * 1024, env="RESULT_CHUNK_SIZE")
+
+    # Pipeline config; pipeline records and step results live this long after the last step started
+    pipeline_ttl_seconds: int = Field(24 * 3600, env="PIPELINE_TTL_SECONDS")
+
+    # Task checkpoint config
+    checkpoint_interval_seconds: float = Field(10.0, env="CHECKPOINT_INTERVAL_SECONDS")
+    checkpoint_ttl_seconds: int = Field(24 * 3600, env="CHECKPOINT_TTL_SECONDS")
+
+    # Task cancellation config
+    cancel_ttl_seconds: int = Field(24 * 3600, env="CANCEL_TTL_SECONDS")
+
+    # Task profiling config
+    profiling_enabled: bool = Field(False, env="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(0.0, env="PROFILING_SAMPLE_RATE")
+    profiling_task_allowlist: str = Field("", env="PROFILING_TASK_ALLOWLIST")
+    profiling_ttl_seconds: int = Field(7 * 24 * 3600, env="PROFILING_TTL_SECONDS")
 
     @property
     def redis_url(self) -> str:
@@ -37,6 +61,17 @@ class Settings(BaseSettings):
             return f"redis://:{self.redis_password}@{self.redis_host}:{self.redis_port}/{self.redis_db}"
         return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
+    @property
+    def profiling_tasks(self) -> set[str]:
+        """Task names that are always profiled when profiling is enabled."""
+        return {name.strip() for name in self.profiling_task_allowlist.split(",") if name.strip()}
+
+    @validator("profiling_sample_rate")
+    def validate_profiling_sample_rate(cls, v):
+        if not 0.0 <= v <= 1.0:
+            raise ValueError("Profiling sample rate must be between 0 and 1.")
+        return v
+
     @validator("jwt_secret_key")
     def validate_jwt_secrets(cls, v):
         if len(v) < 32:
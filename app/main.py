@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Depends, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import get_settings, Settings
 from app.api.api import router as api_router
+from app.services.redis_client import get_redis
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +23,21 @@ app.add_middleware(
 async def read_root():
     return {"message": "Welcome to the FastAPI application!"}
 
+@router.get("/health")
+async def health():
+    """Liveness check; does not touch Redis or the Celery broker"""
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+def readiness():
+    """Readiness check; reports whether Redis (broker and result backend) is reachable"""
+    try:
+        get_redis().ping()
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "unavailable", "redis": False})
+    return {"status": "ok", "redis": True}
+
 @router.get("/config")
 def get_config(settings: Settings = Depends(get_settings)):
     return {
@@ -0,0 +1,34 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ProfileInfo(BaseModel):
+    task_id: str
+    task_name: str
+    state: Optional[str] = None
+    duration: float
+    size: int
+    created_at: str
+    download_url: str
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileInfo]
+    page: int
+    page_size: int
+
+
+class ProfileFunctionStats(BaseModel):
+    function: str
+    calls: int
+    primitive_calls: int
+    total_time: float
+    cumulative_time: float
+
+
+class ProfileAggregateResponse(BaseModel):
+    task_name: str
+    runs: int
+    task_ids: List[str]
+    functions: List[ProfileFunctionStats]
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
 
 
 class TaskStatus(str, Enum):
@@ -14,6 +14,11 @@ class TaskStatus(str, Enum):
     REVOKED = "REVOKED"
     PROGRESS = "PROGRESS"
 
+    @classmethod
+    def from_state(cls, state: str) -> "TaskStatus":
+        """Map a Celery task state to the API status; Celery reports failed tasks as FAILURE."""
+        return cls.FAILED if state == "FAILURE" else cls(state)
+
 
 class TaskType(str, Enum):
     DATA_PROCESSING = "data_processing"
@@ -46,6 +51,15 @@ class ReportGenerationRequest(BaseModel):
     data_range: str = "last_30_days"
 
 
+# Parameters model of each task type; its fields are the arguments the task accepts
+TASK_PARAMETER_MODELS: Dict[TaskType, type[BaseModel]] = {
+    TaskType.DATA_PROCESSING: DataProcessingRequest,
+    TaskType.FILE_PROCESSING: FileProcessingRequest,
+    TaskType.EMAIL_SENDING: EmailTaskRequest,
+    TaskType.REPORT_GENERATION: ReportGenerationRequest,
+}
+
+
 class CreateTaskRequest(BaseModel):
     task_type: TaskType
     parameters: Union[
@@ -96,6 +110,99 @@ class TaskResponse(BaseModel):
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     progress: Optional[int] = None
+    result_size: Optional[int] = None
+    result_url: Optional[str] = None
+
+
+class BatchCreateTaskRequest(BaseModel):
+    tasks: list[CreateTaskRequest] = Field(..., min_length=1, max_length=100)
+
+
+class BatchTaskResponse(BaseModel):
+    tasks: list[TaskResponse]
+
+
+class PipelineStep(BaseModel):
+    id: str
+    task_type: TaskType
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    depends_on: list[str] = Field(default_factory=list)
+    # Task argument name -> id of the step whose result it receives (by reference)
+    inputs: Dict[str, str] = Field(default_factory=dict)
+
+    @property
+    def dependencies(self) -> list[str]:
+        return list(dict.fromkeys([*self.depends_on, *self.inputs.values()]))
+
+    @model_validator(mode="after")
+    def validate_arguments(self):
+        """Check parameters and inputs against the task type's parameters model before anything runs"""
+        fields = TASK_PARAMETER_MODELS[self.task_type].model_fields
+        task_type = self.task_type.value
+
+        unknown = [name for name in self.parameters if name not in fields]
+        if unknown:
+            raise ValueError(f"Step {self.id}: unknown {task_type} parameters: {', '.join(unknown)}")
+        unknown = [name for name in self.inputs if name not in fields]
+        if unknown:
+            raise ValueError(f"Step {self.id}: inputs are not {task_type} arguments: {', '.join(unknown)}")
+        both = [name for name in self.inputs if name in self.parameters]
+        if both:
+            raise ValueError(f"Step {self.id}: arguments given as both parameter and input: {', '.join(both)}")
+        missing = [
+            name
+            for name, field in fields.items()
+            if field.is_required() and name not in self.parameters and name not in self.inputs
+        ]
+        if missing:
+            raise ValueError(f"Step {self.id}: missing {task_type} parameters: {', '.join(missing)}")
+
+        # Inputs are only known at run time, so parameters are validated one by one
+        parameters = {}
+        for name, value in self.parameters.items():
+            try:
+                parameters[name] = TypeAdapter(fields[name].annotation).validate_python(value)
+            except ValidationError as e:
+                raise ValueError(f"Step {self.id}: invalid parameter {name}: {e.errors()[0]['msg']}")
+        self.parameters = parameters
+        return self
+
+
+class CreatePipelineRequest(BaseModel):
+    steps: list[PipelineStep] = Field(..., min_length=1, max_length=20)
+    description: Optional[str] = None
+
+
+class PipelineStepStatus(BaseModel):
+    step_id: str
+    task_id: str
+    task_type: TaskType
+    status: str
+    progress: int = 0
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PipelineResponse(BaseModel):
+    pipeline_id: str
+    status: str
+    progress: int
+    description: Optional[str] = None
+    created_at: datetime
+    failed_task_id: Optional[str] = None
+    steps: list[PipelineStepStatus]
+
+
+class BulkCancelRequest(BaseModel):
+    task_ids: list[str] = Field(default_factory=list, max_length=1000)
+    pipeline_id: Optional[str] = None
+    # Only cancel the selected tasks that are currently in one of these states, e.g. PENDING
+    status: Optional[list[TaskStatus]] = None
+
+
+class BulkCancelResponse(BaseModel):
+    cancelled: list[str]
+    count: int
 
 
 class TaskListResponse(BaseModel):
@@ -114,3 +221,6 @@ class TaskStatusResponse(BaseModel):
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    result_size: Optional[int] = None
+    result_url: Optional[str] = None
+    profile_url: Optional[str] = None
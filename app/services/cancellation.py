@@ -0,0 +1,100 @@
+from typing import Any, Iterable, List, Optional
+
+from app.core.config import get_settings
+from app.services.redis_client import get_redis
+from app.services.task_events import add_version_bump
+
+# Persistent revoked-id set: one key per cancelled task, expiring after CANCEL_TTL_SECONDS
+CANCEL_KEY = "cancelled:{task_id}"
+
+CANCEL_REASON = "cancelled"
+
+
+def cancel_tasks(
+    task_ids: List[str], backend: Optional[Any] = None, only_states: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Flag tasks as cancelled and return the ids that were cancelled. Queued tasks are
+    skipped when a worker picks them up and running tasks stop at their next progress
+    update; no worker is signalled.
+
+    With a result `backend`, tasks that already finished are left alone, `only_states`
+    limits cancelling to tasks currently in those states, and the cancelled tasks are
+    marked REVOKED right away. The Redis work takes a fixed number of round trips.
+    """
+    if backend is not None:
+        current = get_states(backend, task_ids)
+        task_ids = [
+            task_id
+            for task_id, state in zip(task_ids, current)
+            if not _is_ready(state) and (only_states is None or state in only_states)
+        ]
+    if not task_ids:
+        return []
+
+    if backend is not None:
+        _mark_revoked(backend, task_ids)
+
+    settings = get_settings()
+    pipe = get_redis().pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.set(CANCEL_KEY.format(task_id=task_id), 1, ex=settings.cancel_ttl_seconds)
+        add_version_bump(pipe, task_id)
+    pipe.execute()
+    return task_ids
+
+
+def is_cancelled(task_id: str) -> bool:
+    return bool(get_redis().exists(CANCEL_KEY.format(task_id=task_id)))
+
+
+def get_states(backend: Any, task_ids: List[str]) -> List[str]:
+    """Current Celery states of many tasks, read with one MGET where the backend supports it."""
+    from celery import states
+
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    try:
+        values = backend.mget(keys)
+    except (AttributeError, NotImplementedError):
+        return [backend.get_state(task_id) for task_id in task_ids]
+    if hasattr(values, "items"):
+        # Some backends (e.g. cache) return a mapping of the keys found
+        values = [values.get(key) for key in keys]
+    return [backend.decode_result(value)["status"] if value else states.PENDING for value in values]
+
+
+def _is_ready(state: str) -> bool:
+    from celery import states
+
+    return state in states.READY_STATES
+
+
+def _mark_revoked(backend: Any, task_ids: List[str]) -> None:
+    """Store the REVOKED state of many tasks; one pipeline with the Redis result backend."""
+    from celery import states
+    from celery.backends.redis import RedisBackend
+    from celery.exceptions import TaskRevokedError
+
+    if not isinstance(backend, RedisBackend):
+        for task_id in task_ids:
+            backend.mark_as_revoked(task_id, reason=CANCEL_REASON)
+        return
+
+    # Same record and notification as store_result with RedisBackend.set, batched
+    meta = {
+        "status": states.REVOKED,
+        "result": backend.encode_result(TaskRevokedError(CANCEL_REASON), states.REVOKED),
+        "traceback": None,
+        "children": [],
+        "date_done": backend.app.now().isoformat(),
+    }
+    with backend.client.pipeline(transaction=False) as pipe:
+        for task_id in task_ids:
+            key = backend.get_key_for_task(task_id)
+            value = backend.encode({**meta, "task_id": task_id})
+            if backend.expires:
+                pipe.setex(key, backend.expires, value)
+            else:
+                pipe.set(key, value)
+            pipe.publish(key, value)
+        pipe.execute()
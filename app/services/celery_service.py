@@ -0,0 +1,96 @@
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+from app.models.task_models import TaskStatus, TaskStatusResponse, TaskType
+from app.services import profiling, results
+
+if TYPE_CHECKING:
+    from celery import Celery
+
+logger = logging.getLogger(__name__)
+
+# Task names, so the API can publish tasks without importing the task modules
+PROCESS_DATA_TASK = "app.tasks.background_tasks.process_data_task"
+PROCESS_FILE_TASK = "app.tasks.background_tasks.process_file_task"
+SEND_EMAIL_TASK = "app.tasks.background_tasks.send_email_task"
+GENERATE_REPORT_TASK = "app.tasks.background_tasks.generate_report_task"
+
+TASK_NAMES = {
+    TaskType.DATA_PROCESSING: PROCESS_DATA_TASK,
+    TaskType.FILE_PROCESSING: PROCESS_FILE_TASK,
+    TaskType.EMAIL_SENDING: SEND_EMAIL_TASK,
+    TaskType.REPORT_GENERATION: GENERATE_REPORT_TASK,
+}
+
+
+@lru_cache()
+def get_celery_app() -> "Celery":
+    """
+    Import the Celery app on first use.
+    Keeps Celery out of API startup; the broker itself is only contacted on first publish.
+    """
+    from app.celery_app import celery_app
+
+    return celery_app
+
+
+def get_task_data(task_id: str) -> TaskStatusResponse:
+    """Get task status data from the Celery result backend"""
+    try:
+        result = get_celery_app().AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+
+        task_data = {
+            "task_id": task_id,
+            "status": TaskStatus.from_state(result.status),
+            "created_at": datetime.utcnow(),  # This would come from your DB in real app
+            "started_at": None,
+            "completed_at": None,
+            "progress": 0,
+            "result": None,
+            "error": None,
+        }
+
+        if result.state in ("PROGRESS", "STARTED"):
+            task_data.update(
+                {
+                    "progress": info.get("progress", 0),
+                    "result": info.get("status"),
+                    "started_at": datetime.fromisoformat(info["started_at"])
+                    if info.get("started_at")
+                    else datetime.utcnow(),
+                }
+            )
+        elif result.state == "SUCCESS":
+            task_data.update(
+                {
+                    "progress": 100,
+                    "result": info.get("status"),
+                    "result_size": info.get("result_size"),
+                    "result_url": results.result_url(task_id),
+                    "completed_at": datetime.utcnow(),
+                }
+            )
+        elif result.state == "FAILURE":
+            task_data.update(
+                {
+                    "progress": info.get("progress", 0),
+                    "error": str(result.info) if result.info else "Unknown error",
+                    "completed_at": datetime.utcnow(),
+                }
+            )
+
+        # Skip the profile lookup entirely when profiling is off; this is the status poll path
+        if get_settings().profiling_enabled and profiling.has_profile(task_id):
+            task_data["profile_url"] = profiling.profile_url(task_id)
+
+        return TaskStatusResponse(**task_data)
+
+    except Exception as e:
+        logger.error(f"Error getting task data: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get task data")
@@ -0,0 +1,24 @@
+import json
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+from app.services.redis_client import get_redis
+
+CHECKPOINT_KEY = "checkpoint:{task_id}"
+
+
+def save_checkpoint(task_id: str, state: Dict[str, Any]) -> None:
+    """Persist a task's progress cursor and partial aggregates, keyed by task id."""
+    settings = get_settings()
+    get_redis().set(
+        CHECKPOINT_KEY.format(task_id=task_id), json.dumps(state, default=str), ex=settings.checkpoint_ttl_seconds
+    )
+
+
+def load_checkpoint(task_id: str) -> Optional[Dict[str, Any]]:
+    data = get_redis().get(CHECKPOINT_KEY.format(task_id=task_id))
+    return json.loads(data) if data is not None else None
+
+
+def clear_checkpoint(task_id: str) -> None:
+    get_redis().delete(CHECKPOINT_KEY.format(task_id=task_id))
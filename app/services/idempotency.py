@@ -0,0 +1,64 @@
+import hashlib
+from typing import Optional
+
+from app.core.config import get_settings
+from app.services.redis_client import get_redis
+
+# Values are "<task id> <request fingerprint>"
+IDEMPOTENCY_KEY = "idempotency:task:{key}"
+# Items of a batch, kept apart from single submits so client keys never collide
+IDEMPOTENCY_BATCH_KEY = "idempotency:batch:{key}:{index}"
+
+# Delete the key only while it still points at the task that claimed it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotencyKeyReused(Exception):
+    """The idempotency key was already used for a different request."""
+
+    def __init__(self, key: str, task_id: str):
+        super().__init__(f"Idempotency key {key} was already used for a different request (task {task_id})")
+        self.key = key
+        self.task_id = task_id
+
+
+def fingerprint(body: str) -> str:
+    """Hash of a serialized request, stored with the task id so reused keys can be detected."""
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def claim(key: str, task_id: str, request_fingerprint: str, index: Optional[int] = None) -> Optional[str]:
+    """
+    Atomically bind an idempotency key (or item `index` of a batch under it) to `task_id`
+    (SET NX with TTL). Returns None when the claim succeeded, otherwise the task id the key
+    already maps to. Raises IdempotencyKeyReused if that task was created for another request.
+    """
+    settings = get_settings()
+    redis_client = get_redis()
+    redis_key = _redis_key(key, index)
+    if redis_client.set(redis_key, f"{task_id} {request_fingerprint}", nx=True, ex=settings.idempotency_ttl_seconds):
+        return None
+    existing = redis_client.get(redis_key)
+    if existing is None:
+        # Expired between SET and GET; the key is free again
+        return claim(key, task_id, request_fingerprint, index)
+    existing_task_id, _, existing_fingerprint = existing.decode().partition(" ")
+    if existing_fingerprint != request_fingerprint:
+        raise IdempotencyKeyReused(key, existing_task_id)
+    return existing_task_id
+
+
+def release(key: str, task_id: str, request_fingerprint: str, index: Optional[int] = None) -> None:
+    """Free a key claimed by `task_id`, e.g. when publishing the task failed."""
+    get_redis().eval(_RELEASE_SCRIPT, 1, _redis_key(key, index), f"{task_id} {request_fingerprint}")
+
+
+def _redis_key(key: str, index: Optional[int]) -> str:
+    if index is None:
+        return IDEMPOTENCY_KEY.format(key=key)
+    return IDEMPOTENCY_BATCH_KEY.format(key=key, index=index)
@@ -0,0 +1,155 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.services.cancellation import cancel_tasks
+from app.services.redis_client import get_redis
+from app.services.results import expire_result
+
+logger = logging.getLogger(__name__)
+
+# Celery message header carrying the pipeline a step task belongs to
+PIPELINE_HEADER = "pipeline_id"
+
+PIPELINE_KEY = "pipeline:{pipeline_id}"
+PIPELINE_FAILED_KEY = "pipeline:{pipeline_id}:failed"
+
+
+def plan_levels(steps: List[Any]) -> List[List[Any]]:
+    """
+    Validate a pipeline DAG and group its steps into levels.
+    Every step runs after all steps of the previous levels, so each level only
+    depends on earlier ones. Steps need `id` and `dependencies` attributes.
+    """
+    by_id = {step.id: step for step in steps}
+    if len(by_id) != len(steps):
+        raise ValueError("Pipeline step ids must be unique")
+    for step in steps:
+        unknown = [dep for dep in step.dependencies if dep not in by_id]
+        if unknown:
+            raise ValueError(f"Step {step.id} depends on unknown steps: {', '.join(unknown)}")
+
+    levels = []
+    done: set[str] = set()
+    remaining = list(steps)
+    while remaining:
+        level = [step for step in remaining if set(step.dependencies) <= done]
+        if not level:
+            raise ValueError("Pipeline steps contain a dependency cycle")
+        levels.append(level)
+        done.update(step.id for step in level)
+        remaining = [step for step in remaining if step.id not in done]
+    return levels
+
+
+def pipeline_id_of(request: Any) -> Optional[str]:
+    """Id of the pipeline a task request belongs to, if any."""
+    return (request.headers or {}).get(PIPELINE_HEADER) or getattr(request, PIPELINE_HEADER, None)
+
+
+def save_pipeline(record: Dict[str, Any]) -> None:
+    settings = get_settings()
+    get_redis().set(
+        PIPELINE_KEY.format(pipeline_id=record["pipeline_id"]),
+        json.dumps(record, default=str),
+        ex=settings.pipeline_ttl_seconds,
+    )
+
+
+def refresh_pipeline(pipeline_id: str) -> None:
+    """
+    Restart the expiry of a pipeline's record, failure marker and stored step results,
+    so they outlive pipelines that run longer than PIPELINE_TTL_SECONDS in total.
+    """
+    settings = get_settings()
+    ttl = settings.pipeline_ttl_seconds
+    record = get_pipeline(pipeline_id)
+    if record is None:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.expire(PIPELINE_KEY.format(pipeline_id=pipeline_id), ttl)
+    pipe.expire(PIPELINE_FAILED_KEY.format(pipeline_id=pipeline_id), ttl)
+    for step in record["steps"]:
+        expire_result(pipe, step["task_id"], ttl)
+    pipe.execute()
+
+
+def get_pipeline(pipeline_id: str) -> Optional[Dict[str, Any]]:
+    data = get_redis().get(PIPELINE_KEY.format(pipeline_id=pipeline_id))
+    return json.loads(data) if data is not None else None
+
+
+def get_failed_task(pipeline_id: str) -> Optional[str]:
+    task_id = get_redis().get(PIPELINE_FAILED_KEY.format(pipeline_id=pipeline_id))
+    return task_id.decode() if task_id is not None else None
+
+
+def aggregate_status(steps: List[Dict[str, Any]], failed_task_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Overall state and progress of a pipeline from the states of its steps.
+    Steps are in level order; once a step is revoked the chain stops, so pending steps
+    of later levels will never run and count as finished.
+    """
+    # Records saved before levels were stored: treat every step as its own level
+    levels = [index if step.get("level") is None else step["level"] for index, step in enumerate(steps)]
+    revoked_levels = [level for level, step in zip(levels, steps) if step["status"] == "REVOKED"]
+    stopped_after = min(revoked_levels) if revoked_levels else None
+    finished = [
+        step["status"] in ("SUCCESS", "FAILURE", "REVOKED")
+        or (step["status"] == "PENDING" and stopped_after is not None and level > stopped_after)
+        for level, step in zip(levels, steps)
+    ]
+
+    states = [step["status"] for step in steps]
+    if failed_task_id or "FAILURE" in states:
+        status = "FAILURE"
+    elif all(state == "SUCCESS" for state in states):
+        status = "SUCCESS"
+    elif revoked_levels and all(finished):
+        status = "REVOKED"
+    elif all(state == "PENDING" for state in states):
+        status = "PENDING"
+    else:
+        status = "PROGRESS"
+    progress = int(sum(step["progress"] for step in steps) / len(steps)) if steps else 0
+    return {"status": status, "progress": progress}
+
+
+def _on_task_failure(sender=None, task_id=None, **kwargs) -> None:
+    """Short-circuit a pipeline: when one step fails, cancel its steps that have not run yet."""
+    pipeline_id = pipeline_id_of(sender.request)
+    if not pipeline_id:
+        return
+    try:
+        settings = get_settings()
+        get_redis().set(
+            PIPELINE_FAILED_KEY.format(pipeline_id=pipeline_id), task_id, nx=True, ex=settings.pipeline_ttl_seconds
+        )
+        record = get_pipeline(pipeline_id)
+        if record is None:
+            return
+        steps = [step["task_id"] for step in record["steps"] if step["task_id"] != task_id]
+        # Steps that already finished are skipped and keep their state
+        cancelled = cancel_tasks(steps, sender.app.backend)
+        logger.info(f"Pipeline {pipeline_id} failed at task {task_id}, cancelled {len(cancelled)} steps")
+    except Exception as e:
+        logger.error(f"Error short-circuiting pipeline {pipeline_id}: {e}")
+
+
+def _on_task_prerun(sender=None, task_id=None, task=None, **kwargs) -> None:
+    """A pipeline step is starting: keep the pipeline's state alive for another PIPELINE_TTL_SECONDS."""
+    pipeline_id = pipeline_id_of(task.request) if task is not None else None
+    if not pipeline_id:
+        return
+    try:
+        refresh_pipeline(pipeline_id)
+    except Exception as e:
+        logger.error(f"Error refreshing pipeline {pipeline_id}: {e}")
+
+
+def install_pipeline_hooks() -> None:
+    from celery.signals import task_failure, task_prerun
+
+    task_prerun.connect(_on_task_prerun, weak=False)
+    task_failure.connect(_on_task_failure, weak=False)
@@ -0,0 +1,196 @@
+import cProfile
+import logging
+import marshal
+import pstats
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Celery message header that forces profiling of a single task
+PROFILE_HEADER = "profile"
+
+PROFILE_DATA_KEY = "profile:{task_id}:data"
+PROFILE_META_KEY = "profile:{task_id}:meta"
+PROFILE_INDEX_KEY = "profiles"
+PROFILE_TASK_INDEX_KEY = "profiles:{task_name}"
+
+# Profilers for tasks currently running in this worker process, keyed by task id
+_active_profiles: Dict[str, Tuple[cProfile.Profile, float]] = {}
+
+
+class _StoredProfile:
+    """Adapter that lets pstats load stats kept in Redis instead of a file."""
+
+    def __init__(self, stats: Dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def should_profile(task) -> bool:
+    """Decide whether this task run gets profiled (header, allowlist or sampling)."""
+    settings = get_settings()
+    request = task.request
+    headers = request.headers or {}
+    if headers.get(PROFILE_HEADER) or getattr(request, PROFILE_HEADER, False):
+        return True
+    if task.name in settings.profiling_tasks:
+        return True
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+def profile_url(task_id: str) -> str:
+    return f"/api/profiles/{task_id}"
+
+
+def save_profile(task_id: str, task_name: str, profiler: cProfile.Profile, duration: float, state: Optional[str]) -> None:
+    """Store a finished profile in Redis and index it by task name."""
+    settings = get_settings()
+    profiler.create_stats()
+    # Same format as cProfile's dump_stats, so downloads open with pstats/snakeviz
+    data = marshal.dumps(profiler.stats)
+    created_at = time.time()
+    meta = {
+        "task_id": task_id,
+        "task_name": task_name,
+        "state": state or "",
+        "duration": duration,
+        "size": len(data),
+        "created_at": datetime.utcfromtimestamp(created_at).isoformat(),
+    }
+
+    pipe = get_redis().pipeline()
+    pipe.set(PROFILE_DATA_KEY.format(task_id=task_id), data, ex=settings.profiling_ttl_seconds)
+    pipe.hset(PROFILE_META_KEY.format(task_id=task_id), mapping=meta)
+    pipe.expire(PROFILE_META_KEY.format(task_id=task_id), settings.profiling_ttl_seconds)
+    # Trim entries whose profile has expired; each index itself expires with its newest entry
+    expired_before = created_at - settings.profiling_ttl_seconds
+    for index_key in (PROFILE_INDEX_KEY, PROFILE_TASK_INDEX_KEY.format(task_name=task_name)):
+        pipe.zadd(index_key, {task_id: created_at})
+        pipe.zremrangebyscore(index_key, "-inf", expired_before)
+        pipe.expire(index_key, settings.profiling_ttl_seconds)
+    pipe.execute()
+
+
+def has_profile(task_id: str) -> bool:
+    return bool(get_redis().exists(PROFILE_META_KEY.format(task_id=task_id)))
+
+
+def get_profile_meta(task_id: str) -> Optional[Dict[str, Any]]:
+    raw = get_redis().hgetall(PROFILE_META_KEY.format(task_id=task_id))
+    if not raw:
+        return None
+    meta = {key.decode(): value.decode() for key, value in raw.items()}
+    meta["duration"] = float(meta["duration"])
+    meta["size"] = int(meta["size"])
+    meta["state"] = meta["state"] or None
+    meta["download_url"] = profile_url(task_id)
+    return meta
+
+
+def get_profile_data(task_id: str) -> Optional[bytes]:
+    return get_redis().get(PROFILE_DATA_KEY.format(task_id=task_id))
+
+
+def list_profiles(task_name: Optional[str] = None, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+    """List stored profiles, newest first, dropping index entries whose profile expired."""
+    index_key = PROFILE_TASK_INDEX_KEY.format(task_name=task_name) if task_name else PROFILE_INDEX_KEY
+    redis_client = get_redis()
+    profiles = []
+    for raw_id in redis_client.zrevrange(index_key, offset, offset + limit - 1):
+        task_id = raw_id.decode()
+        meta = get_profile_meta(task_id)
+        if meta is None:
+            redis_client.zrem(index_key, task_id)
+            continue
+        profiles.append(meta)
+    return profiles
+
+
+def aggregate_profiles(task_name: str, runs: int = 20, limit: int = 30) -> Dict[str, Any]:
+    """Merge the latest profiles of one task and return the top functions by cumulative time."""
+    stats: Optional[pstats.Stats] = None
+    task_ids = []
+    for meta in list_profiles(task_name, limit=runs):
+        data = get_profile_data(meta["task_id"])
+        if data is None:
+            continue
+        loaded = _StoredProfile(marshal.loads(data))
+        if stats is None:
+            stats = pstats.Stats(loaded)
+        else:
+            stats.add(loaded)
+        task_ids.append(meta["task_id"])
+
+    functions = []
+    if stats is not None:
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        for (filename, line, name), (primitive_calls, calls, total_time, cumulative_time, _) in rows[:limit]:
+            functions.append(
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "primitive_calls": primitive_calls,
+                    "total_time": total_time,
+                    "cumulative_time": cumulative_time,
+                }
+            )
+
+    return {"task_name": task_name, "runs": len(task_ids), "task_ids": task_ids, "functions": functions}
+
+
+def _on_task_prerun(sender=None, task_id=None, task=None, **kwargs) -> None:
+    from app.tasks.aio import runs_on_shared_loop
+
+    if task is None or not should_profile(task):
+        return
+    if runs_on_shared_loop(task):
+        # The profiler would only see the pool thread waiting on the coroutine
+        logger.info(f"Not profiling task {task_id}: async tasks are not profiled under AsyncioPool")
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as exc:
+        # Another profiler is already active in this process
+        logger.warning(f"Could not profile task {task_id}: {exc}")
+        return
+    _active_profiles[task_id] = (profiler, time.perf_counter())
+
+
+def _on_task_postrun(sender=None, task_id=None, task=None, state=None, **kwargs) -> None:
+    entry = _active_profiles.pop(task_id, None)
+    if entry is None:
+        return
+    profiler, started = entry
+    profiler.disable()
+    try:
+        save_profile(task_id, task.name, profiler, time.perf_counter() - started, state)
+        logger.info(f"Stored profile for task {task_id}")
+    except Exception as e:
+        logger.error(f"Error storing profile for task {task_id}: {e}")
+
+
+def install_profiling_hooks() -> None:
+    """
+    Connect the profiler to task execution.
+    Only called when profiling is enabled, so disabled workers pay nothing.
+
+    cProfile profiles the thread that starts it, so coroutine tasks under AsyncioPool,
+    whose bodies run on the shared event loop thread, are not profiled; profile them
+    on a prefork worker, where each runs on a private loop. A task that starts while
+    another profiler is active in its thread (or, on Python 3.12+, in its process) is
+    run without a profile.
+    """
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(_on_task_prerun, weak=False)
+    task_postrun.connect(_on_task_postrun, weak=False)
+    logger.info("Task profiling hooks installed")
@@ -0,0 +1,32 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    import redis
+    import redis.asyncio
+
+
+@lru_cache()
+def get_redis() -> "redis.Redis":
+    """Shared Redis client for application state that lives next to Celery."""
+    import redis
+
+    settings = get_settings()
+    return redis.Redis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=settings.redis_connect_timeout,
+    )
+
+
+@lru_cache()
+def get_async_redis() -> "redis.asyncio.Redis":
+    """Shared asyncio Redis client, for API code that waits on Redis without blocking the event loop."""
+    import redis.asyncio
+
+    settings = get_settings()
+    return redis.asyncio.Redis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=settings.redis_connect_timeout,
+    )
@@ -0,0 +1,91 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import get_settings
+from app.services.redis_client import get_redis
+
+RESULT_DATA_KEY = "task-result:{task_id}:data"
+RESULT_META_KEY = "task-result:{task_id}:meta"
+
+# Marks a task argument as a reference to another task's stored result: {"$ref": "<task id>"}
+RESULT_REF = "$ref"
+
+
+def result_url(task_id: str) -> str:
+    return f"/api/tasks/tasks/{task_id}/result"
+
+
+def store_result(task_id: str, payload: Any, ttl: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Store a task's result payload outside the Celery result backend.
+    Status reads then only fetch the small backend record; the payload is streamed on request.
+    Kept for `ttl` seconds, RESULT_EXPIRES_SECONDS by default.
+    """
+    ttl = ttl or get_settings().result_expires_seconds
+    data = json.dumps(payload, default=str).encode()
+    meta = {
+        "size": len(data),
+        "etag": hashlib.sha256(data).hexdigest()[:32],
+        "content_type": "application/json",
+    }
+
+    pipe = get_redis().pipeline()
+    pipe.set(RESULT_DATA_KEY.format(task_id=task_id), data, ex=ttl)
+    pipe.hset(RESULT_META_KEY.format(task_id=task_id), mapping=meta)
+    pipe.expire(RESULT_META_KEY.format(task_id=task_id), ttl)
+    pipe.execute()
+    return meta
+
+
+def expire_result(pipe: Any, task_id: str, ttl: int) -> None:
+    """Queue a new expiry for a stored result on a Redis pipeline."""
+    pipe.expire(RESULT_DATA_KEY.format(task_id=task_id), ttl)
+    pipe.expire(RESULT_META_KEY.format(task_id=task_id), ttl)
+
+
+def get_result_meta(task_id: str) -> Optional[Dict[str, Any]]:
+    raw = get_redis().hgetall(RESULT_META_KEY.format(task_id=task_id))
+    if not raw:
+        return None
+    meta = {key.decode(): value.decode() for key, value in raw.items()}
+    meta["size"] = int(meta["size"])
+    return meta
+
+
+def iter_result(task_id: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a stored payload in chunks, without loading all of it."""
+    settings = get_settings()
+    redis_client = get_redis()
+    key = RESULT_DATA_KEY.format(task_id=task_id)
+    position = start
+    while position <= end:
+        chunk_end = min(position + settings.result_chunk_size, end + 1) - 1
+        chunk = redis_client.getrange(key, position, chunk_end)
+        if not chunk:
+            # Expired while streaming
+            return
+        yield chunk
+        position += len(chunk)
+
+
+def load_result(task_id: str) -> Any:
+    data = get_redis().get(RESULT_DATA_KEY.format(task_id=task_id))
+    if data is None:
+        raise LookupError(f"No stored result for task {task_id}")
+    return json.loads(data)
+
+
+def result_ref(task_id: str) -> Dict[str, str]:
+    return {RESULT_REF: task_id}
+
+
+def resolve_refs(value: Any) -> Any:
+    """Replace result references anywhere in task arguments with the referenced payloads."""
+    if isinstance(value, dict):
+        if set(value) == {RESULT_REF}:
+            return load_result(value[RESULT_REF])
+        return {key: resolve_refs(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve_refs(item) for item in value)
+    return value
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from app.core.config import get_settings
+from app.services.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Counter bumped on every state or progress change of a task; its value is the task's ETag
+TASK_VERSION_KEY = "task-version:{task_id}"
+TASK_EVENTS_CHANNEL = "task-events:{task_id}"
+
+
+def version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def parse_version_etag(etag: Optional[str]) -> Optional[int]:
+    if not etag:
+        return None
+    value = etag.strip().removeprefix("W/").strip('"')
+    if not value.startswith("v") or not value[1:].isdigit():
+        return None
+    return int(value[1:])
+
+
+def bump_version(task_id: str) -> None:
+    """Record a state change of a task and wake up API requests waiting on it."""
+    pipe = get_redis().pipeline()
+    add_version_bump(pipe, task_id)
+    pipe.execute()
+
+
+def add_version_bump(pipe: Any, task_id: str) -> None:
+    """Queue the commands of `bump_version` on a Redis pipeline, to batch bumps of many tasks."""
+    settings = get_settings()
+    key = TASK_VERSION_KEY.format(task_id=task_id)
+    pipe.incr(key)
+    pipe.expire(key, settings.result_expires_seconds)
+    pipe.publish(TASK_EVENTS_CHANNEL.format(task_id=task_id), 1)
+
+
+async def get_version(task_id: str) -> int:
+    version = await get_async_redis().get(TASK_VERSION_KEY.format(task_id=task_id))
+    return int(version) if version is not None else 0
+
+
+class TaskEventHub:
+    """
+    Waits for task state changes in the API process.
+    All waiting requests share one pub/sub connection, subscribed only to the channels of
+    the tasks someone is waiting on; requests wait on asyncio events, so long-polls cost
+    neither a thread nor a Redis connection each.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Event]] = defaultdict(set)
+        self._subscribed: Set[str] = set()
+        self._pubsub: Optional[Any] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> None:
+        # Connections, locks and the listener belong to one event loop; start over on another
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._subscribed.clear()
+            self._pubsub = None
+            self._listener = None
+            self._lock = asyncio.Lock()
+
+    async def _update_subscription(self, task_id: str) -> None:
+        """Subscribe to a task's channel while it has waiters, unsubscribe once it has none."""
+        channel = TASK_EVENTS_CHANNEL.format(task_id=task_id)
+        async with self._lock:
+            wanted = task_id in self._waiters
+            if wanted == (channel in self._subscribed):
+                return
+            if self._pubsub is None:
+                self._pubsub = get_async_redis().pubsub()
+            if wanted:
+                await self._pubsub.subscribe(channel)
+                self._subscribed.add(channel)
+                if self._listener is None or self._listener.done():
+                    self._listener = asyncio.create_task(self._listen(self._pubsub))
+            else:
+                await self._pubsub.unsubscribe(channel)
+                self._subscribed.discard(channel)
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                task_id = message["channel"].decode().split(":", 1)[1]
+                for event in self._waiters.get(task_id, ()):
+                    event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Task event listener stopped: {e}")
+            # Subscriptions are gone with the connection; wake everyone up to re-check
+            if self._pubsub is pubsub:
+                self._pubsub = None
+                self._subscribed.clear()
+            for events in self._waiters.values():
+                for event in events:
+                    event.set()
+        finally:
+            await pubsub.aclose()
+
+    async def wait_for_change(self, task_id: str, version: int, timeout: float) -> int:
+        """Wait until the task's version differs from `version` or `timeout` passes; return the current version."""
+        self._bind_loop()
+        event = asyncio.Event()
+        self._waiters[task_id].add(event)
+        try:
+            await self._update_subscription(task_id)
+            # Checked after subscribing, so a change published in between is not missed
+            current = await get_version(task_id)
+            if current != version:
+                return current
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await get_version(task_id)
+        finally:
+            self._waiters[task_id].discard(event)
+            if not self._waiters[task_id]:
+                del self._waiters[task_id]
+                try:
+                    await self._update_subscription(task_id)
+                except Exception as e:
+                    logger.error(f"Error unsubscribing from task {task_id}: {e}")
+
+
+task_event_hub = TaskEventHub()
+
+
+def _on_task_event(sender=None, task_id=None, request=None, **kwargs) -> None:
+    task_id = task_id or getattr(request, "id", None)
+    if not task_id:
+        return
+    try:
+        bump_version(task_id)
+    except Exception as e:
+        logger.error(f"Error recording state change of task {task_id}: {e}")
+
+
+def install_task_event_hooks() -> None:
+    """
+    Bump task versions on state writes the task itself does not report: success, failure
+    and retry (also when written by the worker's parent process) and revocation.
+    STARTED is reported by ResultStoreTask.before_start, once it has been stored.
+    """
+    from celery.signals import task_failure, task_postrun, task_retry, task_revoked
+
+    task_postrun.connect(_on_task_event, weak=False)
+    task_failure.connect(_on_task_event, weak=False)
+    task_retry.connect(_on_task_event, weak=False)
+    task_revoked.connect(_on_task_event, weak=False)
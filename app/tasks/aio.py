@@ -0,0 +1,178 @@
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Coroutine, Optional
+
+from celery import Task
+from celery.concurrency.base import apply_target
+from celery.concurrency.thread import ApplyResult, TaskPool
+from celery.exceptions import Ignore
+
+logger = logging.getLogger(__name__)
+
+# Request of the async task whose coroutine is running in the current context
+_current_request: ContextVar[Optional[Any]] = ContextVar("current_async_request", default=None)
+
+# Job being run by the current pool thread, so its coroutine can be cancelled
+_current_job = threading.local()
+
+# Event loop of the AsyncioPool in this worker process, if there is one
+_event_loop: Optional["_EventLoopThread"] = None
+
+
+def runs_on_shared_loop(task: Task) -> bool:
+    """Whether `task`'s body runs as a coroutine on this worker's shared event loop."""
+    return _event_loop is not None and inspect.iscoroutinefunction(task.run)
+
+
+class _EventLoopThread:
+    """One asyncio loop per worker process, running in a daemon thread and shared by all async tasks."""
+
+    def __init__(self, limit: int):
+        self.loop = asyncio.new_event_loop()
+        # Blocking calls of coroutines (`asyncio.to_thread`, e.g. backend writes in `aupdate_state`)
+        # run here; one thread per in-flight task, so they never queue behind each other
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=limit, thread_name_prefix="asyncio-io")
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="asyncio-tasks", daemon=True)
+        self.thread.start()
+
+    async def execute(self, coro: Coroutine, request: Any, timeout: Optional[float]) -> Any:
+        _current_request.set(request)
+        return await asyncio.wait_for(coro, timeout)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.executor.shutdown(wait=False)
+
+
+class _Job:
+    """Handle for one task run by the pool; cancelling it cancels the task's coroutine."""
+
+    def __init__(self):
+        self.future: Optional[concurrent.futures.Future] = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class _JobResult(ApplyResult):
+    def __init__(self, future: concurrent.futures.Future, job: _Job):
+        super().__init__(future)
+        self.job = job
+
+    def terminate(self, signal=None) -> None:
+        # Called by `revoke(terminate=True)`; threads cannot be killed, coroutines can be cancelled
+        self.job.cancel()
+
+
+def _apply_job(job: _Job, *args: Any) -> Any:
+    _current_job.job = job
+    try:
+        return apply_target(*args)
+    finally:
+        _current_job.job = None
+
+
+class AsyncioPool(TaskPool):
+    """
+    Worker pool for I/O-bound queues. Celery only accepts its own pool names for `-P`,
+    so it is selected as the custom pool:
+
+        CELERY_CUSTOM_WORKER_POOL=app.tasks.aio:AsyncioPool celery worker -P custom -c 200
+
+    This is Celery's threads pool with a shared event loop: coroutine task bodies of all
+    in-flight tasks run on one loop per process and interleave their I/O there, and can
+    be cancelled. Celery's tracer is synchronous, though, so each in-flight task still
+    holds a pool thread, blocked waiting on its coroutine; `-c` is both the number of
+    in-flight tasks and of those threads. Sync task bodies run in their pool thread as
+    with `-P threads`.
+    """
+
+    def on_start(self) -> None:
+        global _event_loop
+        _event_loop = _EventLoopThread(self.limit)
+        super().on_start()
+
+    def on_stop(self) -> None:
+        global _event_loop
+        super().on_stop()
+        if _event_loop is not None:
+            _event_loop.stop()
+            _event_loop = None
+
+    def on_apply(self, target, args=None, kwargs=None, callback=None, accept_callback=None, **_):
+        job = _Job()
+        future = self.executor.submit(_apply_job, job, target, args, kwargs, callback, accept_callback)
+        return _JobResult(future, job)
+
+    def terminate_job(self, pid, signal=None) -> None:
+        # The job itself is cancelled through its _JobResult
+        pass
+
+
+class AsyncTask(Task):
+    """
+    Task base that runs `async def` task bodies.
+
+    Under AsyncioPool the coroutine runs on the worker's shared event loop; elsewhere
+    (e.g. prefork workers) it runs on a private loop. The coroutine is limited by the
+    task's soft time limit and is cancelled on `revoke(terminate=True)`.
+    """
+
+    def _get_request(self):
+        request = _current_request.get()
+        if request is not None:
+            return request
+        return super()._get_request()
+
+    request = property(_get_request)
+
+    def __call__(self, *args, **kwargs):
+        retval = super().__call__(*args, **kwargs)
+        if not inspect.iscoroutine(retval):
+            return retval
+        return self._run_coroutine(retval)
+
+    def _timeout(self) -> Optional[float]:
+        timelimit = self.request.timelimit or (None, None)
+        return timelimit[1] or self.soft_time_limit or self.app.conf.task_soft_time_limit
+
+    def _run_coroutine(self, coro: Coroutine) -> Any:
+        request = self.request
+        timeout = self._timeout()
+
+        if _event_loop is None:
+            return asyncio.run(self._execute_standalone(coro, request, timeout))
+
+        loop_thread = _event_loop
+        job = getattr(_current_job, "job", None)
+        future = asyncio.run_coroutine_threadsafe(loop_thread.execute(coro, request, timeout), loop_thread.loop)
+        if job is not None:
+            job.future = future
+            if job.cancelled:
+                future.cancel()
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            # Revoked while running; keep the REVOKED state instead of recording a failure
+            logger.info(f"Task {request.id} cancelled")
+            raise Ignore()
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _execute_standalone(self, coro: Coroutine, request: Any, timeout: Optional[float]) -> Any:
+        _current_request.set(request)
+        return await asyncio.wait_for(coro, timeout)
+
+    async def aupdate_state(self, *args, **kwargs) -> None:
+        """`update_state` for coroutines; runs the backend write off the event loop."""
+        await asyncio.to_thread(self.update_state, *args, **kwargs)
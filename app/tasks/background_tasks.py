@@ -1,33 +1,52 @@
+import asyncio
 import time
 import random
 from datetime import datetime
 from typing import Dict, Any
 from celery import Celery
+from celery.exceptions import Retry
 from app.celery_app import celery_app
+from app.tasks.base import ResultStoreTask, TaskCancelled
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, base=ResultStoreTask)
 def process_data_task(self, data_size: int, processing_time: int, include_error: bool = False):
     """
     Simulate data processing task with progress updates
     """
     try:
-        # Update task state to STARTED
-        self.update_state(
-            state='STARTED',
-            meta={
-                'progress': 0,
-                'status': 'Processing started',
-                'started_at': datetime.utcnow().isoformat()
-            }
-        )
-        
-        # Simulate processing with progress updates
         total_steps = 10
-        for i in range(total_steps):
+
+        # Resume from the last checkpoint if this task was re-delivered or retried
+        checkpoint = self.load_checkpoint() or {'step': 0}
+        if checkpoint['step']:
+            logger.info(f"Resuming data processing task {self.request.id} at step {checkpoint['step'] + 1}")
+            # Keep the progress the earlier delivery reached rather than starting over at 0%
+            self.update_state(
+                state='PROGRESS',
+                meta={
+                    'progress': int(checkpoint['step'] / total_steps * 100),
+                    'status': f"Resumed at step {checkpoint['step'] + 1}/{total_steps}",
+                    'current_step': checkpoint['step'],
+                    'total_steps': total_steps
+                }
+            )
+        else:
+            # Update task state to STARTED
+            self.update_state(
+                state='STARTED',
+                meta={
+                    'progress': 0,
+                    'status': 'Processing started',
+                    'started_at': datetime.utcnow().isoformat()
+                }
+            )
+
+        # Simulate processing with progress updates
+        for i in range(checkpoint['step'], total_steps):
             if include_error and i == 7:  # Simulate error at 70%
                 raise Exception("Simulated processing error")
                 
@@ -44,6 +63,7 @@ def process_data_task(self, data_size: int, processing_time: int, include_error:
                     'total_steps': total_steps
                 }
             )
+            self.checkpoint({'step': i + 1})
         
         # Generate mock results
         result = {
@@ -61,11 +81,15 @@ def process_data_task(self, data_size: int, processing_time: int, include_error:
             'result': result
         }
         
+    except (TaskCancelled, Retry):
+        raise
     except Exception as exc:
         logger.error(f"Data processing task failed: {exc}")
         self.update_state(
             state='FAILURE',
             meta={
+                'exc_type': type(exc).__name__,
+                'exc_message': str(exc),
                 'error': str(exc),
                 'progress': self.request.kwargs.get('progress', 0),
                 'failed_at': datetime.utcnow().isoformat()
@@ -74,13 +98,13 @@ def process_data_task(self, data_size: int, processing_time: int, include_error:
         raise
 
 
-@celery_app.task(bind=True)
-def process_file_task(self, file_url: str, operation: str = "analyze"):
+@celery_app.task(bind=True, base=ResultStoreTask)
+async def process_file_task(self, file_url: str, operation: str = "analyze"):
     """
-    Simulate file processing task
+    Simulate file processing task (I/O-bound download, then processing off the event loop)
     """
     try:
-        self.update_state(
+        await self.aupdate_state(
             state='STARTED',
             meta={
                 'progress': 0,
@@ -91,21 +115,21 @@ def process_file_task(self, file_url: str, operation: str = "analyze"):
         )
         
         # Simulate file download
-        time.sleep(2)
-        self.update_state(
+        await asyncio.sleep(2)
+        await self.aupdate_state(
             state='PROGRESS',
             meta={'progress': 25, 'status': 'File downloaded'}
         )
         
-        # Simulate file processing
-        time.sleep(3)
-        self.update_state(
+        # Simulate file processing; CPU-bound work must not block the event loop
+        await asyncio.to_thread(time.sleep, 3)
+        await self.aupdate_state(
             state='PROGRESS',
             meta={'progress': 75, 'status': f'Performing {operation}'}
         )
         
         # Simulate completion
-        time.sleep(1)
+        await asyncio.sleep(1)
         
         result = {
             'file_url': file_url,
@@ -121,26 +145,28 @@ def process_file_task(self, file_url: str, operation: str = "analyze"):
             'result': result
         }
         
+    except (TaskCancelled, Retry):
+        raise
     except Exception as exc:
         logger.error(f"File processing task failed: {exc}")
-        self.update_state(
+        await self.aupdate_state(
             state='FAILURE',
-            meta={'error': str(exc)}
+            meta={'exc_type': type(exc).__name__, 'exc_message': str(exc), 'error': str(exc)}
         )
         raise
 
 
-@celery_app.task(bind=True)
-def send_email_task(self, recipient: str, subject: str, message: str, delay_seconds: int = 0):
+@celery_app.task(bind=True, base=ResultStoreTask)
+async def send_email_task(self, recipient: str, subject: str, message: str, delay_seconds: int = 0):
     """
-    Simulate email sending task
+    Simulate email sending task (I/O-bound, runs as a coroutine)
     """
     try:
         if delay_seconds > 0:
             logger.info(f"Delaying email task for {delay_seconds} seconds")
-            time.sleep(delay_seconds)
+            await asyncio.sleep(delay_seconds)
         
-        self.update_state(
+        await self.aupdate_state(
             state='STARTED',
             meta={
                 'progress': 0,
@@ -150,14 +176,14 @@ def send_email_task(self, recipient: str, subject: str, message: str, delay_seco
         )
         
         # Simulate email preparation
-        time.sleep(1)
-        self.update_state(
+        await asyncio.sleep(1)
+        await self.aupdate_state(
             state='PROGRESS',
             meta={'progress': 50, 'status': 'Sending email'}
         )
         
         # Simulate email sending
-        time.sleep(2)
+        await asyncio.sleep(2)
         
         result = {
             'recipient': recipient,
@@ -173,50 +199,57 @@ def send_email_task(self, recipient: str, subject: str, message: str, delay_seco
             'result': result
         }
         
+    except (TaskCancelled, Retry):
+        raise
     except Exception as exc:
         logger.error(f"Email task failed: {exc}")
-        self.update_state(
+        await self.aupdate_state(
             state='FAILURE',
-            meta={'error': str(exc)}
+            meta={'exc_type': type(exc).__name__, 'exc_message': str(exc), 'error': str(exc)}
         )
         raise
 
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, base=ResultStoreTask)
 def generate_report_task(self, report_type: str, parameters: Dict[str, Any]):
     """
     Simulate report generation task
     """
     try:
-        self.update_state(
-            state='STARTED',
-            meta={
-                'progress': 0,
-                'status': 'Report generation started',
-                'report_type': report_type
-            }
-        )
-        
-        # Simulate data collection
-        time.sleep(3)
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 30, 'status': 'Collecting data'}
-        )
-        
-        # Simulate data processing
-        time.sleep(4)
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 70, 'status': 'Processing data'}
-        )
-        
-        # Simulate report generation
-        time.sleep(2)
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 90, 'status': 'Generating report'}
-        )
+        # Simulate data collection, data processing and report generation; each
+        # finished phase is checkpointed so a re-delivered task skips it
+        phases = [
+            (3, 30, 'Collecting data'),
+            (4, 70, 'Processing data'),
+            (2, 90, 'Generating report'),
+        ]
+        completed_phases = (self.load_checkpoint() or {}).get('phase', 0)
+        if completed_phases:
+            # Keep the progress the earlier delivery reached rather than starting over at 0%
+            _, progress, status = phases[completed_phases - 1]
+            self.update_state(
+                state='PROGRESS',
+                meta={'progress': progress, 'status': f'Resumed after: {status}'}
+            )
+        else:
+            self.update_state(
+                state='STARTED',
+                meta={
+                    'progress': 0,
+                    'status': 'Report generation started',
+                    'report_type': report_type
+                }
+            )
+
+        for phase, (duration, progress, status) in enumerate(phases):
+            if phase < completed_phases:
+                continue
+            time.sleep(duration)
+            self.update_state(
+                state='PROGRESS',
+                meta={'progress': progress, 'status': status}
+            )
+            self.checkpoint({'phase': phase + 1}, force=True)
         
         time.sleep(1)
         
@@ -235,10 +268,12 @@ def generate_report_task(self, report_type: str, parameters: Dict[str, Any]):
             'result': result
         }
         
+    except (TaskCancelled, Retry):
+        raise
     except Exception as exc:
         logger.error(f"Report generation task failed: {exc}")
         self.update_state(
             state='FAILURE',
-            meta={'error': str(exc)}
+            meta={'exc_type': type(exc).__name__, 'exc_message': str(exc), 'error': str(exc)}
         )
         raise
\ No newline at end of file
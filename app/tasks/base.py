@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from celery import states
+from celery.exceptions import Ignore, Retry
+
+from app.core.config import get_settings
+from app.services.cancellation import CANCEL_REASON, is_cancelled
+from app.services.checkpoints import clear_checkpoint, load_checkpoint, save_checkpoint
+from app.services.pipelines import pipeline_id_of
+from app.services.results import resolve_refs, store_result
+from app.services.task_events import bump_version
+from app.tasks.aio import AsyncTask
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Ignore):
+    """Raised at a safe point of a cancelled task; the task ends as REVOKED."""
+
+
+class ResultStoreTask(AsyncTask):
+    """
+    Task base that moves the `result` payload of a task's return value out of the
+    result backend into the result store, leaving only its size and ETag behind.
+    Arguments that reference other tasks' results are loaded from the store on start.
+
+    Also provides checkpoints: a task re-delivered after a worker loss, or retried,
+    runs under the same id and resumes from `load_checkpoint()`. Checkpoints are
+    removed once the task finishes, unless it is being retried.
+
+    Cancellation is cooperative: a cancelled task is skipped if it has not started yet,
+    and otherwise stops with TaskCancelled at its next progress update or `check_cancelled()`.
+    """
+
+    def __call__(self, *args, **kwargs):
+        try:
+            self.check_cancelled()
+            retval = super().__call__(*resolve_refs(args), **resolve_refs(kwargs))
+        except Retry:
+            raise
+        except TaskCancelled:
+            self._clear_checkpoint()
+            self.backend.mark_as_revoked(self.request.id, reason=CANCEL_REASON, request=self.request)
+            logger.info(f"Task {self.request.id} cancelled")
+            raise
+        except Exception:
+            # Failed for good; interpreter exits (worker shutdown) keep the checkpoint
+            self._clear_checkpoint()
+            raise
+        self._clear_checkpoint()
+
+        # Called directly rather than by a worker: nothing to store under
+        if self.request.id is None or not isinstance(retval, dict) or "result" not in retval:
+            return retval
+
+        # Results of pipeline steps are inputs of later steps; keep them as long as the pipeline
+        ttl = get_settings().pipeline_ttl_seconds if pipeline_id_of(self.request) else None
+        meta = store_result(self.request.id, retval["result"], ttl)
+        summary = {key: value for key, value in retval.items() if key != "result"}
+        summary.update({"result_size": meta["size"], "result_etag": meta["etag"]})
+        return summary
+
+    def before_start(self, task_id, args, kwargs):
+        # The worker has stored STARTED by now; let long-polling status requests see it
+        bump_version(task_id)
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        # Progress updates double as cancellation points
+        if state not in states.READY_STATES and task_id in (None, self.request.id):
+            self.check_cancelled()
+        super().update_state(task_id, state, meta, **kwargs)
+        # Lets long-polling status requests see the new state right away
+        task_id = task_id or self.request.id
+        if task_id is not None:
+            bump_version(task_id)
+
+    def check_cancelled(self) -> None:
+        """Raise TaskCancelled if this task has been cancelled; call it at safe points of long loops."""
+        if self.request.id is not None and is_cancelled(self.request.id):
+            raise TaskCancelled()
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Last checkpoint saved by an earlier delivery of this task, if any."""
+        if self.request.id is None:
+            return None
+        return load_checkpoint(self.request.id)
+
+    def checkpoint(self, state: Dict[str, Any], force: bool = False) -> bool:
+        """
+        Save `state` as this task's checkpoint, at most every CHECKPOINT_INTERVAL_SECONDS
+        unless `force` is set. Returns whether it was saved.
+        """
+        if self.request.id is None:
+            return False
+        now = time.monotonic()
+        last_saved = getattr(self.request, "checkpointed_at", None)
+        if not force and last_saved is not None and now - last_saved < get_settings().checkpoint_interval_seconds:
+            return False
+        save_checkpoint(self.request.id, state)
+        self.request.checkpointed_at = now
+        return True
+
+    async def acheckpoint(self, state: Dict[str, Any], force: bool = False) -> bool:
+        """`checkpoint` for coroutines; runs the Redis write off the event loop."""
+        return await asyncio.to_thread(self.checkpoint, state, force)
+
+    def _clear_checkpoint(self) -> None:
+        if self.request.id is not None:
+            clear_checkpoint(self.request.id)
@@ -0,0 +1,90 @@
+"""
+Import-time budget for the API and worker entry points.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters, takes the
+median cumulative import time and fails if it is over budget. The API entry point
+must also start without importing Celery, Redis or the task modules.
+
+    python scripts/check_import_time.py [--runs 5] [--api-budget-ms 900] [--worker-budget-ms 600]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+API_MODULE = "app.main"
+WORKER_MODULE = "app.celery_app"
+
+# Modules that must stay out of API startup; they load on first use
+API_LAZY_MODULES = ["celery", "kombu", "redis", "app.celery_app", "app.tasks.background_tasks"]
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    # Settings has required secrets; placeholders are enough to import the app
+    env.setdefault("JWT_SECRET_KEY", "x" * 32)
+    env.setdefault("DATABASE_URL", "postgresql://localhost/importtime")
+    return env
+
+
+def measure_import_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, in milliseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=_env(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # import time: <self us> | <cumulative us> | <module>
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def eagerly_imported(module: str, candidates: list[str]) -> list[str]:
+    """Return which of `candidates` get imported as a side effect of importing `module`."""
+    code = f"import sys, {module}; print(' '.join(m for m in {candidates!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, env=_env()
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    return proc.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-budget-ms", type=float, default=900.0)
+    parser.add_argument("--worker-budget-ms", type=float, default=600.0)
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in ((API_MODULE, args.api_budget_ms), (WORKER_MODULE, args.worker_budget_ms)):
+        median = statistics.median(measure_import_ms(module) for _ in range(args.runs))
+        status = "ok" if median <= budget else "OVER BUDGET"
+        print(f"{module}: {median:.1f} ms (budget {budget:.0f} ms) {status}")
+        failed |= median > budget
+
+    leaked = eagerly_imported(API_MODULE, API_LAZY_MODULES)
+    if leaked:
+        print(f"{API_MODULE} eagerly imports: {', '.join(leaked)}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import os
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+# Settings has required secrets; placeholders are enough for the tests
+os.environ.setdefault("JWT_SECRET_KEY", "x" * 32)
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/tests")
+
+from app.services import (  # noqa: E402
+    cancellation,
+    checkpoints,
+    idempotency,
+    pipelines,
+    profiling,
+    results,
+    task_events,
+)
+
+# Service modules that talk to Redis through get_redis()
+REDIS_MODULES = [cancellation, checkpoints, idempotency, pipelines, profiling, results, task_events]
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """In-memory Redis shared by all service modules for one test, through sync and asyncio clients"""
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server)
+    async_client = fakeredis.aioredis.FakeRedis(server=server)
+    for module in REDIS_MODULES:
+        monkeypatch.setattr(module, "get_redis", lambda: client)
+    monkeypatch.setattr(task_events, "get_async_redis", lambda: async_client)
+    return client
+
+
+@pytest.fixture
+def client(redis_client):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
@@ -0,0 +1,106 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+from celery import states
+
+from app.celery_app import celery_app
+from app.tasks import aio
+from app.tasks.aio import AsyncioPool, AsyncTask
+
+
+@celery_app.task(bind=True, base=AsyncTask)
+async def sleeping_task(self, seconds):
+    await asyncio.sleep(seconds)
+    return {"task_id": self.request.id, "thread": threading.current_thread().name}
+
+
+@celery_app.task(bind=True, base=AsyncTask, soft_time_limit=0.1)
+async def slow_task(self):
+    await asyncio.sleep(5)
+
+
+@celery_app.task(base=AsyncTask)
+async def blocking_call_task():
+    return await asyncio.to_thread(lambda: threading.current_thread().name)
+
+
+@celery_app.task(base=AsyncTask)
+def sync_task():
+    return threading.current_thread().name
+
+
+@pytest.fixture
+def pool():
+    """AsyncioPool started as a worker would start it, with its shared event loop"""
+    pool = AsyncioPool(limit=4)
+    pool.start()
+    yield pool
+    pool.stop()
+    assert aio._event_loop is None
+
+
+def run_in_pool(pool, apply):
+    """Run `apply` on a pool thread, as the worker runs a task; returns the job and a future of its EagerResult"""
+    future = concurrent.futures.Future()
+    job = pool.apply_async(apply, callback=future.set_result)
+    return job, future
+
+
+def test_coroutine_runs_without_a_pool():
+    assert aio._event_loop is None
+    result = sleeping_task.apply(args=(0,), task_id="t-1")
+    assert result.get()["task_id"] == "t-1"
+
+
+def test_coroutine_is_limited_by_the_soft_time_limit():
+    started = time.monotonic()
+    result = slow_task.apply()
+    assert result.state == states.FAILURE
+    assert isinstance(result.result, asyncio.TimeoutError)
+    assert time.monotonic() - started < 2
+
+
+def test_pool_runs_coroutines_on_the_shared_loop_concurrently(pool):
+    started = time.monotonic()
+    jobs = [
+        run_in_pool(pool, lambda task_id=f"t-{i}": sleeping_task.apply(args=(0.3,), task_id=task_id))
+        for i in range(4)
+    ]
+    values = [future.result(timeout=5).get() for _, future in jobs]
+
+    # Four 0.3s sleeps interleave on one loop instead of running back to back
+    assert time.monotonic() - started < 1.0
+    assert {value["thread"] for value in values} == {"asyncio-tasks"}
+    assert sorted(value["task_id"] for value in values) == ["t-0", "t-1", "t-2", "t-3"]
+
+
+def test_pool_runs_blocking_calls_in_its_own_executor(pool):
+    _, future = run_in_pool(pool, blocking_call_task.apply)
+    assert future.result(timeout=5).get().startswith("asyncio-io")
+    assert aio._event_loop.executor._max_workers == 4
+
+
+def test_pool_runs_sync_tasks_in_pool_threads(pool):
+    _, future = run_in_pool(pool, sync_task.apply)
+    assert future.result(timeout=5).get() != "asyncio-tasks"
+
+
+def test_pool_timeout_applies_on_the_shared_loop(pool):
+    _, future = run_in_pool(pool, slow_task.apply)
+    result = future.result(timeout=5)
+    assert result.state == states.FAILURE
+    assert isinstance(result.result, asyncio.TimeoutError)
+
+
+def test_terminating_a_job_cancels_its_coroutine(pool):
+    job, future = run_in_pool(pool, lambda: sleeping_task.apply(args=(5,)))
+    time.sleep(0.2)
+    started = time.monotonic()
+    job.terminate()
+
+    result = future.result(timeout=5)
+    assert result.state == states.IGNORED
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+from celery import states
+from celery.backends.cache import CacheBackend
+from celery.backends.redis import RedisBackend
+from celery.exceptions import TaskRevokedError
+
+from app.api.endpoints import tasks
+from app.celery_app import celery_app
+from app.services import cancellation
+from app.services.cancellation import CANCEL_REASON
+from app.tasks.background_tasks import process_data_task
+from app.tasks.base import TaskCancelled
+
+
+@pytest.fixture
+def backend(redis_client):
+    """Redis result backend writing to the test's in-memory Redis"""
+    backend = RedisBackend(app=celery_app, url="redis://localhost/0")
+    backend.client = redis_client
+    return backend
+
+
+def test_cancel_without_backend_only_sets_flags(redis_client):
+    assert cancellation.cancel_tasks(["a", "b"]) == ["a", "b"]
+    assert cancellation.is_cancelled("a") and cancellation.is_cancelled("b")
+    assert not cancellation.is_cancelled("c")
+    assert redis_client.ttl("cancelled:a") > 0
+    assert redis_client.get("task-version:a") == b"1"
+
+
+def test_cancel_skips_finished_tasks(backend):
+    backend.store_result("done", {"ok": True}, states.SUCCESS)
+    backend.store_result("running", {"progress": 50}, states.STARTED)
+
+    assert cancellation.cancel_tasks(["done", "running", "queued"], backend) == ["running", "queued"]
+    assert not cancellation.is_cancelled("done")
+    assert backend.get_task_meta("done")["status"] == states.SUCCESS
+
+
+def test_cancel_marks_tasks_revoked(backend):
+    cancellation.cancel_tasks(["running", "queued"], backend)
+
+    for task_id in ("running", "queued"):
+        meta = backend.get_task_meta(task_id)
+        assert meta["status"] == states.REVOKED
+        assert meta["task_id"] == task_id
+        assert meta["date_done"] is not None
+        assert isinstance(meta["result"], TaskRevokedError)
+        assert str(meta["result"]) == CANCEL_REASON
+
+
+def test_cancel_only_selected_states(backend):
+    backend.store_result("running", {"progress": 50}, states.STARTED)
+
+    assert cancellation.cancel_tasks(["running", "queued"], backend, [states.PENDING]) == ["queued"]
+    assert backend.get_task_meta("running")["status"] == states.STARTED
+
+
+def test_get_states(backend):
+    backend.store_result("done", {"ok": True}, states.SUCCESS)
+    backend.store_result("running", {"progress": 50}, states.STARTED)
+
+    assert cancellation.get_states(backend, ["done", "running", "queued"]) == [
+        states.SUCCESS,
+        states.STARTED,
+        states.PENDING,
+    ]
+
+
+def test_get_states_with_a_mapping_mget():
+    backend = CacheBackend(app=celery_app, backend="memory", url="memory://")
+    backend.store_result("done", {"ok": True}, states.SUCCESS)
+
+    assert cancellation.get_states(backend, ["queued", "done"]) == [states.PENDING, states.SUCCESS]
+
+
+def test_cancelled_task_stops_at_its_next_progress_update(redis_client):
+    process_data_task.push_request(id="running")
+    try:
+        process_data_task.check_cancelled()
+        cancellation.cancel_tasks(["running"])
+        with pytest.raises(TaskCancelled):
+            process_data_task.check_cancelled()
+        with pytest.raises(TaskCancelled):
+            process_data_task.update_state(state="PROGRESS", meta={"progress": 10})
+    finally:
+        process_data_task.pop_request()
+
+
+def test_cancel_endpoint(client, backend, monkeypatch):
+    monkeypatch.setattr(tasks, "get_celery_app", lambda: SimpleNamespace(backend=backend))
+    backend.store_result("done", {"ok": True}, states.SUCCESS)
+
+    response = client.delete("/api/tasks/tasks/queued")
+    assert response.status_code == 200
+    assert backend.get_task_meta("queued")["status"] == states.REVOKED
+
+    response = client.delete("/api/tasks/tasks/done")
+    assert response.status_code == 409
+
+    response = client.post("/api/tasks/tasks/cancel", json={"task_ids": ["done", "other"]})
+    assert response.json() == {"cancelled": ["other"], "count": 1}
@@ -0,0 +1,82 @@
+import pytest
+from celery.exceptions import Retry
+
+from app.core.config import get_settings
+from app.services.checkpoints import load_checkpoint, save_checkpoint
+from app.tasks import background_tasks
+from app.tasks.background_tasks import generate_report_task, process_data_task
+
+TASK_ID = "task-1"
+
+
+@pytest.fixture
+def states(redis_client, monkeypatch):
+    """Record the states a task reports instead of writing them to the result backend"""
+    reported = []
+
+    def update_state(task_id=None, state=None, meta=None, **kwargs):
+        reported.append((state, meta))
+
+    monkeypatch.setattr(process_data_task, "update_state", update_state)
+    monkeypatch.setattr(generate_report_task, "update_state", update_state)
+    monkeypatch.setattr(get_settings(), "checkpoint_interval_seconds", 0)
+    monkeypatch.setattr(background_tasks.time, "sleep", lambda seconds: None)
+    return reported
+
+
+def process_data(**kwargs):
+    return process_data_task.apply(
+        kwargs={"data_size": 10, "processing_time": 0, **kwargs}, task_id=TASK_ID
+    )
+
+
+def test_resumed_task_runs_only_the_remaining_steps(states):
+    save_checkpoint(TASK_ID, {"step": 8})
+
+    assert process_data().successful()
+
+    state, meta = states[0]
+    assert state == "PROGRESS"
+    assert meta["progress"] == 80
+    assert [meta["current_step"] for state, meta in states[1:]] == [9, 10]
+
+
+def test_fresh_task_starts_at_zero(states):
+    assert process_data().successful()
+
+    assert states[0][0] == "STARTED"
+    assert states[0][1]["progress"] == 0
+    assert [meta["current_step"] for state, meta in states[1:]] == list(range(1, 11))
+
+
+def test_resumed_report_skips_finished_phases(states):
+    save_checkpoint(TASK_ID, {"phase": 2})
+
+    assert generate_report_task.apply(args=("sales", {}), task_id=TASK_ID).successful()
+
+    assert [(state, meta["progress"]) for state, meta in states] == [("PROGRESS", 70), ("PROGRESS", 90)]
+
+
+def test_checkpoint_is_cleared_on_success(states):
+    save_checkpoint(TASK_ID, {"step": 8})
+    process_data()
+    assert load_checkpoint(TASK_ID) is None
+
+
+def test_checkpoint_is_cleared_on_failure(states):
+    save_checkpoint(TASK_ID, {"step": 5})
+
+    assert process_data(include_error=True).failed()
+    assert load_checkpoint(TASK_ID) is None
+
+
+def test_checkpoint_is_kept_on_retry(states, monkeypatch):
+    def sleep(seconds):
+        if load_checkpoint(TASK_ID) == {"step": 4}:
+            raise Retry()
+
+    monkeypatch.setattr(background_tasks.time, "sleep", sleep)
+
+    assert process_data().state == "RETRY"
+    assert load_checkpoint(TASK_ID) == {"step": 4}
+    assert "FAILURE" not in [state for state, meta in states]
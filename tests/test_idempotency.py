@@ -0,0 +1,156 @@
+from datetime import datetime
+
+import pytest
+
+from app.api.endpoints import tasks
+from app.models.task_models import TaskResponse, TaskStatus, TaskType
+from app.services import idempotency
+
+TASKS_URL = "/api/tasks/tasks/"
+BATCH_URL = "/api/tasks/tasks/batch"
+
+
+REQUEST = idempotency.fingerprint("request")
+
+
+def test_first_claim_succeeds(redis_client):
+    assert idempotency.claim("key", "task-1", REQUEST) is None
+    assert redis_client.ttl("idempotency:task:key") > 0
+
+
+def test_second_claim_returns_first_task(redis_client):
+    assert idempotency.claim("key", "task-1", REQUEST) is None
+    assert idempotency.claim("key", "task-2", REQUEST) == "task-1"
+
+
+def test_claim_for_a_different_request_is_rejected(redis_client):
+    idempotency.claim("key", "task-1", REQUEST)
+    with pytest.raises(idempotency.IdempotencyKeyReused) as excinfo:
+        idempotency.claim("key", "task-2", idempotency.fingerprint("other request"))
+    assert excinfo.value.task_id == "task-1"
+
+
+def test_batch_items_do_not_collide_with_single_keys(redis_client):
+    assert idempotency.claim("key:0", "task-1", REQUEST) is None
+    assert idempotency.claim("key", "task-2", REQUEST, index=0) is None
+    assert idempotency.claim("key", "task-3", REQUEST, index=1) is None
+    assert redis_client.exists("idempotency:batch:key:0")
+
+
+def test_release_frees_the_key(redis_client):
+    idempotency.claim("key", "task-1", REQUEST)
+    idempotency.release("key", "task-1", REQUEST)
+    assert idempotency.claim("key", "task-2", REQUEST) is None
+
+
+def test_release_keeps_a_key_reclaimed_by_another_task(redis_client):
+    idempotency.claim("key", "task-1", REQUEST)
+    # The claim expired and another request took the key before task-1 released it
+    redis_client.delete("idempotency:task:key")
+    assert idempotency.claim("key", "task-2", REQUEST) is None
+
+    idempotency.release("key", "task-1", REQUEST)
+    assert idempotency.claim("key", "task-3", REQUEST) == "task-2"
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record published tasks instead of sending them; items whose description is in `failing` fail once"""
+    calls = []
+    failing = set()
+
+    def publish(request, task_id, options):
+        if request.description in failing:
+            failing.discard(request.description)
+            raise ConnectionError("broker unavailable")
+        calls.append((request.description, task_id))
+
+    def task_info(task_id):
+        return TaskResponse(
+            task_id=task_id,
+            task_type=TaskType.EMAIL_SENDING,
+            status=TaskStatus.PENDING,
+            created_at=datetime.utcnow(),
+        )
+
+    monkeypatch.setattr(tasks, "_publish_task", publish)
+    monkeypatch.setattr(tasks, "get_task_info", task_info)
+    return calls, failing
+
+
+def email(description):
+    return {
+        "task_type": "email_sending",
+        "parameters": {"recipient": "a@b", "subject": "s", "message": "m"},
+        "description": description,
+    }
+
+
+def test_batch_retry_republishes_only_missing_items(client, published):
+    calls, failing = published
+    batch = {"tasks": [email("first"), email("second"), email("third")]}
+    headers = {"Idempotency-Key": "batch-1"}
+
+    failing.add("third")
+    response = client.post(BATCH_URL, json=batch, headers=headers)
+    assert response.status_code == 500
+    assert [description for description, _ in calls] == ["first", "second"]
+
+    response = client.post(BATCH_URL, json=batch, headers=headers)
+    assert response.status_code == 200
+    assert [description for description, _ in calls] == ["first", "second", "third"]
+    task_ids = [task["task_id"] for task in response.json()["tasks"]]
+    assert task_ids == [task_id for _, task_id in calls]
+
+    # A further retry publishes nothing and returns the same tasks
+    response = client.post(BATCH_URL, json=batch, headers=headers)
+    assert [task["task_id"] for task in response.json()["tasks"]] == task_ids
+    assert len(calls) == 3
+
+
+def test_batch_without_key_always_publishes(client, published):
+    calls, _ = published
+    batch = {"tasks": [email("first")]}
+    client.post(BATCH_URL, json=batch)
+    client.post(BATCH_URL, json=batch)
+    assert len(calls) == 2
+
+
+def test_reused_key_returns_the_first_task(client, published):
+    calls, _ = published
+    headers = {"Idempotency-Key": "submit-1"}
+
+    first = client.post(TASKS_URL, json=email("first"), headers=headers)
+    second = client.post(TASKS_URL, json=email("first"), headers=headers)
+    assert second.status_code == 200
+    assert second.json()["task_id"] == first.json()["task_id"]
+    assert len(calls) == 1
+
+
+def test_reused_key_with_a_different_request_is_rejected(client, published):
+    calls, _ = published
+    headers = {"Idempotency-Key": "submit-1"}
+
+    client.post(TASKS_URL, json=email("first"), headers=headers)
+    response = client.post(TASKS_URL, json=email("second"), headers=headers)
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+def test_changed_batch_item_is_rejected(client, published):
+    calls, _ = published
+    headers = {"Idempotency-Key": "batch-1"}
+
+    client.post(BATCH_URL, json={"tasks": [email("first"), email("second")]}, headers=headers)
+    response = client.post(BATCH_URL, json={"tasks": [email("first"), email("changed")]}, headers=headers)
+    assert response.status_code == 422
+    assert len(calls) == 2
+
+
+def test_batch_keys_do_not_collide_with_single_submits(client, published):
+    calls, _ = published
+
+    client.post(TASKS_URL, json=email("single"), headers={"Idempotency-Key": "batch-1:0"})
+    response = client.post(BATCH_URL, json={"tasks": [email("first")]}, headers={"Idempotency-Key": "batch-1"})
+    assert response.status_code == 200
+    assert [description for description, _ in calls] == ["single", "first"]
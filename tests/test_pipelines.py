@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import get_settings
+from app.models.task_models import PipelineStep
+from app.services import pipelines, results
+from app.services.pipelines import PIPELINE_HEADER, aggregate_status, plan_levels
+
+
+def step(step_id, depends_on=(), inputs=None):
+    return PipelineStep(
+        id=step_id, task_type="data_processing", depends_on=list(depends_on), inputs=inputs or {}
+    )
+
+
+def level_ids(levels):
+    return [[s.id for s in level] for level in levels]
+
+
+def step_params(task_type, parameters):
+    return PipelineStep(id="s", task_type=task_type, parameters=parameters).parameters
+
+
+def test_plan_levels_groups_independent_steps():
+    steps = [step("a"), step("b"), step("c", ["a", "b"]), step("d", ["c"])]
+    assert level_ids(plan_levels(steps)) == [["a", "b"], ["c"], ["d"]]
+
+
+def test_plan_levels_diamond():
+    steps = [step("d", ["b", "c"]), step("b", ["a"]), step("c", ["a"]), step("a")]
+    assert level_ids(plan_levels(steps)) == [["a"], ["b", "c"], ["d"]]
+
+
+def test_plan_levels_inputs_are_dependencies():
+    steps = [step("a"), step("b", inputs={"data_size": "a"})]
+    assert level_ids(plan_levels(steps)) == [["a"], ["b"]]
+
+
+def test_plan_levels_rejects_duplicate_ids():
+    with pytest.raises(ValueError, match="unique"):
+        plan_levels([step("a"), step("a")])
+
+
+def test_plan_levels_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="unknown steps: missing"):
+        plan_levels([step("a"), step("b", ["a", "missing"])])
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [step("a", ["a"])],
+        [step("a", ["b"]), step("b", ["a"])],
+        [step("root"), step("a", ["root", "c"]), step("b", ["a"]), step("c", ["b"])],
+    ],
+)
+def test_plan_levels_rejects_cycles(steps):
+    with pytest.raises(ValueError, match="cycle"):
+        plan_levels(steps)
+
+
+def test_step_parameters_are_validated_and_coerced():
+    assert step_params("data_processing", {"data_size": "5"}) == {"data_size": 5}
+
+
+@pytest.mark.parametrize(
+    "task_type, parameters, inputs, error",
+    [
+        ("email_sending", {"bogus": 1}, {}, "unknown email_sending parameters: bogus"),
+        ("email_sending", {"recipient": "a@b", "subject": "s"}, {}, "missing email_sending parameters: message"),
+        ("email_sending", {"recipient": "a@b", "subject": "s"}, {"body": "a"}, "not email_sending arguments: body"),
+        ("email_sending", {"recipient": "a@b", "subject": "s", "message": "m"}, {"message": "a"}, "both"),
+        ("data_processing", {"data_size": "many"}, {}, "invalid parameter data_size"),
+    ],
+)
+def test_step_arguments_are_rejected(task_type, parameters, inputs, error):
+    with pytest.raises(ValidationError, match=error):
+        PipelineStep(id="s", task_type=task_type, parameters=parameters, inputs=inputs)
+
+
+def test_required_step_argument_can_come_from_an_input():
+    pipeline_step = PipelineStep(
+        id="s",
+        task_type="email_sending",
+        parameters={"recipient": "a@b", "subject": "s"},
+        inputs={"message": "a"},
+    )
+    assert pipeline_step.dependencies == ["a"]
+
+
+@pytest.mark.parametrize(
+    "states, failed_task_id, expected",
+    [
+        (["SUCCESS", "SUCCESS"], None, "SUCCESS"),
+        (["PENDING", "PENDING"], None, "PENDING"),
+        (["SUCCESS", "PENDING"], None, "PROGRESS"),
+        (["SUCCESS", "FAILURE"], None, "FAILURE"),
+        (["SUCCESS", "REVOKED"], "task-1", "FAILURE"),
+        (["REVOKED", "REVOKED"], None, "REVOKED"),
+        (["SUCCESS", "REVOKED", "PENDING"], None, "REVOKED"),
+        (["SUCCESS", "REVOKED", "STARTED"], None, "PROGRESS"),
+    ],
+)
+def test_aggregate_status(states, failed_task_id, expected):
+    steps = [{"status": state, "progress": 100 if state == "SUCCESS" else 0} for state in states]
+    assert aggregate_status(steps, failed_task_id)["status"] == expected
+
+
+def test_aggregate_status_waits_for_steps_of_the_revoked_level():
+    # A sibling in the revoked step's group can still run
+    steps = [
+        {"status": "REVOKED", "progress": 0, "level": 0},
+        {"status": "PENDING", "progress": 0, "level": 0},
+        {"status": "PENDING", "progress": 0, "level": 1},
+    ]
+    assert aggregate_status(steps, None)["status"] == "PROGRESS"
+    steps[1]["status"] = "SUCCESS"
+    assert aggregate_status(steps, None)["status"] == "REVOKED"
+
+
+def test_pipeline_step_start_refreshes_pipeline_state(redis_client):
+    ttl = get_settings().pipeline_ttl_seconds
+    pipelines.save_pipeline(
+        {"pipeline_id": "p1", "steps": [{"step_id": "a", "task_id": "t-a"}, {"step_id": "b", "task_id": "t-b"}]}
+    )
+    results.store_result("t-a", {"rows": 1}, ttl=60)
+    redis_client.set("pipeline:p1:failed", "t-a", ex=60)
+    redis_client.expire("pipeline:p1", 60)
+
+    task = SimpleNamespace(request=SimpleNamespace(headers={PIPELINE_HEADER: "p1"}))
+    pipelines._on_task_prerun(task_id="t-b", task=task)
+
+    for key in ("pipeline:p1", "pipeline:p1:failed", "task-result:t-a:data", "task-result:t-a:meta"):
+        assert redis_client.ttl(key) > ttl - 5
+    assert not redis_client.exists("task-result:t-b:data")
+
+
+def test_tasks_outside_pipelines_refresh_nothing(redis_client):
+    task = SimpleNamespace(request=SimpleNamespace(headers={}))
+    pipelines._on_task_prerun(task_id="t-a", task=task)
+    assert redis_client.keys() == []
@@ -0,0 +1,142 @@
+import cProfile
+import marshal
+import pstats
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import profiling
+from app.services.profiling import PROFILE_HEADER
+from app.tasks import aio
+
+
+def work(n):
+    return sum(range(n))
+
+
+def profiled(calls):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(calls):
+        work(10)
+    profiler.disable()
+    return profiler
+
+
+def task(name="app.tasks.work", headers=None, run=work):
+    return SimpleNamespace(name=name, run=run, request=SimpleNamespace(headers=headers or {}))
+
+
+def work_stats(aggregate):
+    return next(row for row in aggregate["functions"] if row["function"].endswith("(work)"))
+
+
+def test_saved_profile_is_listed_and_downloadable(client, redis_client):
+    profiling.save_profile("t-1", "app.tasks.work", profiled(3), 0.5, "SUCCESS")
+
+    meta = profiling.get_profile_meta("t-1")
+    assert meta["task_name"] == "app.tasks.work"
+    assert meta["duration"] == 0.5
+    assert meta["state"] == "SUCCESS"
+    assert redis_client.ttl("profile:t-1:data") > 0
+
+    response = client.get("/api/profiles/t-1")
+    assert response.status_code == 200
+    stats = pstats.Stats(profiling._StoredProfile(marshal.loads(response.content)))
+    assert any(name == "work" for _, _, name in stats.stats)
+
+
+def test_list_profiles_newest_first_by_task(redis_client):
+    profiling.save_profile("t-1", "app.tasks.work", profiled(1), 0.1, "SUCCESS")
+    profiling.save_profile("t-2", "app.tasks.other", profiled(1), 0.1, "SUCCESS")
+    profiling.save_profile("t-3", "app.tasks.work", profiled(1), 0.1, "FAILURE")
+
+    assert [meta["task_id"] for meta in profiling.list_profiles()] == ["t-3", "t-2", "t-1"]
+    assert [meta["task_id"] for meta in profiling.list_profiles("app.tasks.work")] == ["t-3", "t-1"]
+    assert [meta["task_id"] for meta in profiling.list_profiles(offset=1, limit=1)] == ["t-2"]
+
+
+def test_list_profiles_drops_expired_entries(redis_client):
+    profiling.save_profile("t-1", "app.tasks.work", profiled(1), 0.1, "SUCCESS")
+    profiling.save_profile("t-2", "app.tasks.work", profiled(1), 0.1, "SUCCESS")
+    redis_client.delete("profile:t-1:meta", "profile:t-1:data")
+
+    assert [meta["task_id"] for meta in profiling.list_profiles()] == ["t-2"]
+    assert redis_client.zrange("profiles", 0, -1) == [b"t-2"]
+
+
+def test_aggregate_merges_runs(redis_client):
+    profiling.save_profile("t-1", "app.tasks.work", profiled(2), 0.1, "SUCCESS")
+    profiling.save_profile("t-2", "app.tasks.work", profiled(3), 0.1, "SUCCESS")
+    profiling.save_profile("t-3", "app.tasks.other", profiled(7), 0.1, "SUCCESS")
+
+    aggregate = profiling.aggregate_profiles("app.tasks.work")
+    assert aggregate["runs"] == 2
+    assert aggregate["task_ids"] == ["t-2", "t-1"]
+    assert work_stats(aggregate)["calls"] == 5
+
+    assert profiling.aggregate_profiles("app.tasks.work", runs=1)["runs"] == 1
+    assert profiling.aggregate_profiles("app.tasks.missing") == {
+        "task_name": "app.tasks.missing",
+        "runs": 0,
+        "task_ids": [],
+        "functions": [],
+    }
+
+
+@pytest.fixture
+def hooks(redis_client, monkeypatch):
+    """Run a task body between the profiling hooks, as a worker would"""
+    monkeypatch.setattr(get_settings(), "profiling_sample_rate", 0.0)
+
+    def run(task_id, profiled_task, body=lambda: work(10)):
+        profiling._on_task_prerun(task_id=task_id, task=profiled_task)
+        try:
+            body()
+        finally:
+            profiling._on_task_postrun(task_id=task_id, task=profiled_task, state="SUCCESS")
+
+    return run
+
+
+def test_hooks_profile_tasks_with_the_header(hooks):
+    hooks("t-1", task(headers={PROFILE_HEADER: True}))
+
+    assert profiling.get_profile_meta("t-1")["state"] == "SUCCESS"
+    assert work_stats(profiling.aggregate_profiles("app.tasks.work"))["calls"] == 1
+    assert profiling._active_profiles == {}
+
+
+def test_hooks_profile_allowlisted_tasks(hooks, monkeypatch):
+    monkeypatch.setattr(get_settings(), "profiling_task_allowlist", "app.tasks.work")
+
+    hooks("t-1", task())
+    hooks("t-2", task(name="app.tasks.other"))
+
+    assert profiling.has_profile("t-1")
+    assert not profiling.has_profile("t-2")
+
+
+def test_hooks_skip_tasks_when_another_profiler_is_active(hooks, monkeypatch):
+    class BusyProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", BusyProfile)
+    hooks("t-1", task(headers={PROFILE_HEADER: True}))
+
+    assert not profiling.has_profile("t-1")
+    assert profiling._active_profiles == {}
+
+
+def test_hooks_skip_async_tasks_on_the_shared_loop(hooks, monkeypatch):
+    async def run():
+        pass
+
+    monkeypatch.setattr(aio, "_event_loop", object())
+    hooks("t-1", task(headers={PROFILE_HEADER: True}, run=run))
+    hooks("t-2", task(headers={PROFILE_HEADER: True}))
+
+    assert not profiling.has_profile("t-1")
+    assert profiling.has_profile("t-2")
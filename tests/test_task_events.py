@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app.api.endpoints import tasks
+from app.models.task_models import TaskStatus, TaskStatusResponse
+from app.services import task_events
+from app.services.task_events import TaskEventHub, bump_version, parse_version_etag, version_etag
+
+TASK_ID = "task-1"
+STATUS_URL = f"/api/tasks/tasks/{TASK_ID}"
+
+
+@pytest.mark.parametrize(
+    "etag, version",
+    [('"v3"', 3), ('W/"v3"', 3), ("v3", 3), ('"v"', None), ('"3"', None), ('"vx"', None), ("", None), (None, None)],
+)
+def test_parse_version_etag(etag, version):
+    assert parse_version_etag(etag) == version
+
+
+def test_bump_version_counts_and_expires(redis_client):
+    bump_version(TASK_ID)
+    bump_version(TASK_ID)
+    assert asyncio.run(task_events.get_version(TASK_ID)) == 2
+    assert redis_client.ttl(f"task-version:{TASK_ID}") > 0
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Serve task states without a result backend; records the ids read"""
+    read_ids = []
+
+    def get_task_data(task_id):
+        read_ids.append(task_id)
+        return TaskStatusResponse(task_id=task_id, status=TaskStatus.PROGRESS, progress=50, created_at=datetime.utcnow())
+
+    monkeypatch.setattr(tasks, "get_task_data", get_task_data)
+    return read_ids
+
+
+def test_status_carries_the_version_etag(client, reads):
+    response = client.get(STATUS_URL)
+    assert response.status_code == 200
+    assert response.headers["etag"] == version_etag(0)
+
+    bump_version(TASK_ID)
+    assert client.get(STATUS_URL).headers["etag"] == version_etag(1)
+
+
+def test_unchanged_status_is_not_modified(client, reads):
+    bump_version(TASK_ID)
+
+    response = client.get(STATUS_URL, headers={"If-None-Match": version_etag(1)})
+    assert response.status_code == 304
+    assert response.headers["etag"] == version_etag(1)
+    # A 304 does not read the result backend
+    assert reads == []
+
+
+def test_changed_status_is_sent(client, reads):
+    bump_version(TASK_ID)
+    bump_version(TASK_ID)
+
+    response = client.get(STATUS_URL, headers={"If-None-Match": version_etag(1)})
+    assert response.status_code == 200
+    assert response.headers["etag"] == version_etag(2)
+    assert response.json()["progress"] == 50
+
+
+def test_long_poll_times_out_unchanged(client, reads):
+    started = time.monotonic()
+    response = client.get(STATUS_URL, params={"wait": 0.3}, headers={"If-None-Match": version_etag(0)})
+    assert response.status_code == 304
+    assert time.monotonic() - started >= 0.3
+
+
+def test_long_poll_returns_on_change(client, reads):
+    threading.Timer(0.2, bump_version, args=(TASK_ID,)).start()
+
+    started = time.monotonic()
+    response = client.get(STATUS_URL, params={"wait": 10}, headers={"If-None-Match": version_etag(0)})
+    assert response.status_code == 200
+    assert response.headers["etag"] == version_etag(1)
+    assert time.monotonic() - started < 5
+
+
+def test_wait_returns_at_once_when_the_version_is_stale(redis_client):
+    bump_version(TASK_ID)
+    hub = TaskEventHub()
+
+    started = time.monotonic()
+    assert asyncio.run(hub.wait_for_change(TASK_ID, 0, timeout=10)) == 1
+    assert time.monotonic() - started < 5
+
+
+def test_wait_wakes_up_on_a_change_of_its_task_only(redis_client):
+    hub = TaskEventHub()
+
+    async def wait_and_bump():
+        waiter = asyncio.create_task(hub.wait_for_change(TASK_ID, 0, timeout=10))
+        await asyncio.sleep(0.1)
+        assert hub._subscribed == {f"task-events:{TASK_ID}"}
+
+        await asyncio.to_thread(bump_version, "other-task")
+        await asyncio.sleep(0.2)
+        assert not waiter.done()
+
+        await asyncio.to_thread(bump_version, TASK_ID)
+        return await asyncio.wait_for(waiter, 5)
+
+    assert asyncio.run(wait_and_bump()) == 1
+    assert hub._waiters == {}
+    assert hub._subscribed == set()
+
+
+def test_wait_times_out_and_unsubscribes(redis_client):
+    hub = TaskEventHub()
+
+    assert asyncio.run(hub.wait_for_change(TASK_ID, 0, timeout=0.2)) == 0
+    assert hub._waiters == {}
+    assert hub._subscribed == set()
+
+
+def test_channel_stays_subscribed_while_a_task_has_waiters(redis_client):
+    hub = TaskEventHub()
+
+    async def two_waiters():
+        short = asyncio.create_task(hub.wait_for_change(TASK_ID, 0, timeout=0.1))
+        long = asyncio.create_task(hub.wait_for_change(TASK_ID, 0, timeout=10))
+        await short
+        assert hub._subscribed == {f"task-events:{TASK_ID}"}
+
+        await asyncio.to_thread(bump_version, TASK_ID)
+        return await asyncio.wait_for(long, 5)
+
+    assert asyncio.run(two_waiters()) == 1
+    assert hub._subscribed == set()
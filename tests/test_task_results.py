@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from app.api.endpoints.tasks import _parse_range
+from app.core.config import get_settings
+from app.services import results
+
+TASK_ID = "task-1"
+PAYLOAD = {"rows": list(range(100))}
+DATA = json.dumps(PAYLOAD).encode()
+SIZE = len(DATA)
+RESULT_URL = f"/api/tasks/tasks/{TASK_ID}/result"
+
+
+@pytest.fixture
+def stored(redis_client):
+    return results.store_result(TASK_ID, PAYLOAD)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-0", (0, 0)),
+        ("bytes=10-19", (10, 19)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("Bytes=1-2", (1, 2)),
+    ],
+)
+def test_parse_range(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["bytes=0-1,5-6", "bytes=a-b", "bytes=1-x", "bytes=+1-2", "bytes=1_0-20", "bytes=-", "items=0-1", "bytes=5-1"],
+)
+def test_parse_range_ignores_malformed_or_unsupported(header):
+    assert _parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize(
+    "header, size",
+    [("bytes=100-", 100), ("bytes=100-200", 100), ("bytes=-0", 100), ("bytes=0-0", 0), ("bytes=-5", 0)],
+)
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        _parse_range(header, size)
+
+
+def test_full_result(client, stored):
+    response = client.get(RESULT_URL)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["content-length"] == str(SIZE)
+    assert response.headers["etag"] == f'"{stored["etag"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "content-range" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=0-0", 0, 0), ("bytes=10-", 10, SIZE - 1), ("bytes=-10", SIZE - 10, SIZE - 1), ("bytes=5-9", 5, 9)],
+)
+def test_range_request(client, stored, header, start, end):
+    response = client.get(RESULT_URL, headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == DATA[start : end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{SIZE}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "bytes=a-b", "items=0-1"])
+def test_unsupported_range_serves_full_result(client, stored, header):
+    response = client.get(RESULT_URL, headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+@pytest.mark.parametrize("header", [f"bytes={SIZE}-", f"bytes={SIZE + 10}-{SIZE + 20}", "bytes=-0"])
+def test_range_past_the_end(client, stored, header):
+    response = client.get(RESULT_URL, headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+
+def test_offset_and_limit(client, stored):
+    response = client.get(RESULT_URL, params={"offset": 5, "limit": 10})
+    assert response.status_code == 206
+    assert response.content == DATA[5:15]
+    assert response.headers["content-range"] == f"bytes 5-14/{SIZE}"
+
+
+def test_limit_past_the_end_is_truncated(client, stored):
+    response = client.get(RESULT_URL, params={"offset": SIZE - 3, "limit": 100})
+    assert response.status_code == 206
+    assert response.content == DATA[-3:]
+
+
+def test_offset_past_the_end(client, stored):
+    response = client.get(RESULT_URL, params={"offset": SIZE})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+
+def test_result_is_streamed_in_chunks(client, stored, monkeypatch):
+    monkeypatch.setattr(get_settings(), "result_chunk_size", 7)
+    response = client.get(RESULT_URL, headers={"Range": "bytes=3-40"})
+    assert response.status_code == 206
+    assert response.content == DATA[3:41]
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_if_none_match_not_modified(client, stored, if_none_match):
+    etag = f'"{stored["etag"]}"'
+    response = client.get(RESULT_URL, headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_if_none_match_changed(client, stored):
+    response = client.get(RESULT_URL, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.content == DATA